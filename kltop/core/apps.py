@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+
+        if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+            from .sqllog import install
+
+            connection_created.connect(install)
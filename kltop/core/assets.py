@@ -0,0 +1,166 @@
+"""Раздача статики и медиа самим приложением.
+
+Полные ответы отдаются через FileResponse: WSGI-сервер получает объект
+файла через ``wsgi.file_wrapper`` и может отправить его через sendfile
+без копирования в пространство пользователя.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+# ManifestStaticFilesStorage добавляет к имени 12 символов md5.
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat):
+    return '"{:x}-{:x}"'.format(int(stat.st_mtime), stat.st_size)
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def parse_range(header, size):
+    """Возвращает (start, end) включительно или None для неверного Range.
+
+    Несколько диапазонов в одном заголовке не поддерживаются.
+    """
+    matches = RANGE_HEADER.match(header.strip())
+    if not matches or not size:
+        return None
+    start, end = matches.groups()
+    if not start:
+        if not end or int(end) == 0:
+            return None
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def read_range(fullpath, start, length):
+    with open(fullpath, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, fullpath, cache_control):
+    """Отдает файл с ETag, Last-Modified, Cache-Control и поддержкой Range."""
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    etag = file_etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if etag_matches(if_none_match, etag) or (
+        if_none_match is None and not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size)
+    ):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        byte_range = parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(stat.st_size)
+            return response
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(fullpath, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(
+            start, end, stat.st_size)
+    else:
+        response = FileResponse(open(fullpath, 'rb'),
+                                content_type=content_type)
+    for header, value in headers.items():
+        response[header] = value
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+def normalize(path):
+    return posixpath.normpath(path).lstrip('/')
+
+
+@require_safe
+def serve_static(request, path):
+    """Статика из STATIC_ROOT.
+
+    Имена с хешем от ManifestStaticFilesStorage кешируются навсегда,
+    остальные файлы браузер перепроверяет по ETag.
+    """
+    path = normalize(path)
+    fullpath = None
+    if settings.STATIC_ROOT:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+        if not os.path.isfile(fullpath):
+            fullpath = None
+    if fullpath is None and settings.DEBUG:
+        fullpath = finders.find(path)
+    if fullpath is None:
+        raise Http404
+    if HASHED_NAME.search(path):
+        cache_control = IMMUTABLE_CACHE
+    else:
+        cache_control = 'public, max-age=0, must-revalidate'
+    return serve_file(request, fullpath, cache_control)
+
+
+@require_safe
+def serve_media(request, path):
+    """Загруженные пользователями файлы из MEDIA_ROOT."""
+    fullpath = safe_join(settings.MEDIA_ROOT, normalize(path))
+    cache_control = 'public, max-age={}'.format(settings.MEDIA_MAX_AGE)
+    return serve_file(request, fullpath, cache_control)
@@ -0,0 +1,77 @@
+"""Файловый кеш, общий для всех воркеров ``manage.py serve``.
+
+LocMemCache у каждого процесса свой: выход из аккаунта, смена пароля или
+новая статья сбрасывали бы записи только в воркере, который обработал
+запрос. Каталог на диске видят все процессы сервера.
+
+FileBasedCache из Django перед каждой записью перечисляет все файлы
+каталога, чтобы решить, не пора ли его чистить. Здесь это делается в
+среднем раз в CULL_CHECK_EVERY записей. Кроме того, add() и incr()
+атомарны для всех процессов, как в memcached: они выполняются под
+блокировкой файла, а incr() сохраняет срок жизни записи. Под той же
+блокировкой lock(key) можно прочитать и переписать запись самому.
+Блокировок LOCK_STRIPES, ключ выбирает одну из них, поэтому запросы с
+разными ключами обычно не ждут друг друга.
+"""
+import os
+import pickle
+import random
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.files import locks
+
+CULL_CHECK_EVERY = 100
+LOCK_STRIPES = 16
+# Не заканчивается на .djcache, поэтому clear() их не трогает.
+LOCK_FILE = 'lock.{}'
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    @contextmanager
+    def lock(self, key, version=None):
+        """Блокирует запись key для всех процессов."""
+        self._createdir()
+        # Имя файла записи уже содержит md5 ключа.
+        name = os.path.basename(self._key_to_file(key, version))
+        stripe = int(name[:8], 16) % LOCK_STRIPES
+        with open(os.path.join(self._dir, LOCK_FILE.format(stripe)),
+                  'ab') as file:
+            locks.lock(file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(file)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.lock(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.lock(key, version):
+            expiry, value = self.read(key, version)
+            if value is None:
+                raise ValueError("Key '%s' not found" % key)
+            value += delta
+            timeout = None if expiry is None else expiry - time.time()
+            self.set(key, value, timeout, version)
+            return value
+
+    def read(self, key, version=None):
+        """(срок жизни, значение) или (None, None), если записи нет."""
+        try:
+            with open(self._key_to_file(key, version), 'rb') as file:
+                expiry = pickle.load(file)
+                if expiry is not None and expiry < time.time():
+                    return None, None
+                return expiry, pickle.loads(zlib.decompress(file.read()))
+        except (FileNotFoundError, EOFError):
+            return None, None
+
+    def _cull(self):
+        if random.randrange(CULL_CHECK_EVERY):
+            return
+        super()._cull()
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Warning, register
+
+# Эти кеши у каждого процесса свои.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """Кешированные сессии и пользователь требуют общего кеша."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint='Sessions, the session user, feed versions and rate limits '
+             'go stale in other workers of `manage.py serve`. Configure a '
+             'shared cache such as core.cache.FileBasedCache or memcached.',
+        id='core.W001',
+    )]
+
+
+@register()
+def ratelimit_lock_check(app_configs, **kwargs):
+    """Корзины лимитов атомарны только у кеша с lock()."""
+    if not settings.RATELIMIT_ENABLED or hasattr(caches['default'], 'lock'):
+        return []
+    return [Warning(
+        'The default cache cannot lock rate limit buckets.',
+        hint='Concurrent requests may take the same token. Use '
+             'core.cache.FileBasedCache.',
+        id='core.W002',
+    )]
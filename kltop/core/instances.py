@@ -0,0 +1,100 @@
+"""Кеш экземпляров моделей по первичному и естественному ключу.
+
+Объект хранится под ключом pk, а естественный ключ (slug, username)
+ссылается на pk, поэтому объект лежит в кеше в одном экземпляре и
+сбрасывается удалением одной записи. Отсутствующие объекты тоже
+кешируются на NEGATIVE_CACHE_TIMEOUT секунд, чтобы повторные 404 не
+доходили до базы. Значение естественного ключа входит в ключ кеша в
+виде хеша: в slug и username бывают символы и длина, которые memcached
+не принимает.
+
+Объект кешируется целиком. У пользователя это включает хеш пароля: без
+него не проверить хеш сессии, не обращаясь к базе. Поэтому кеш должен
+быть закрыт от посторонних, как и сама база: каталог файлового кеша
+Django создает с правами 0700, memcached не должен слушать внешние
+адреса.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+MISSING = 'missing'
+
+
+class InstanceCache:
+    def __init__(self, model, natural_key, timeout=None):
+        self.model = model
+        self.natural_key = natural_key
+        self.timeout = timeout
+        self.prefix = 'instance:{}'.format(model._meta.label_lower)
+
+    def get_timeout(self):
+        if self.timeout is None:
+            return settings.INSTANCE_CACHE_TIMEOUT
+        return self.timeout
+
+    def pk_key(self, pk):
+        return '{}:pk:{}'.format(self.prefix, pk)
+
+    def natural_cache_key(self, value):
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return '{}:{}:{}'.format(self.prefix, self.natural_key, digest)
+
+    def get_by_pk(self, pk):
+        """Объект по pk или None."""
+        return self.get_many([pk]).get(pk)
+
+    def get_many(self, pks):
+        """Словарь pk -> объект; недостающие читаются одним запросом."""
+        pks = set(pks)
+        keys = {self.pk_key(pk): pk for pk in pks}
+        found = {keys[key]: obj
+                 for key, obj in cache.get_many(list(keys)).items()}
+        missing = pks - set(found)
+        if missing:
+            loaded = self.model._default_manager.in_bulk(missing)
+            cache.set_many({self.pk_key(pk): obj
+                            for pk, obj in loaded.items()},
+                           self.get_timeout())
+            found.update(loaded)
+        return found
+
+    def get(self, value):
+        """Объект по естественному ключу или None."""
+        key = self.natural_cache_key(value)
+        pk = cache.get(key)
+        if pk == MISSING:
+            return None
+        if pk is not None:
+            obj = self.get_by_pk(pk)
+            # После переименования старый ключ указывает на другой объект.
+            if (obj is not None
+                    and getattr(obj, self.natural_key) == value):
+                return obj
+        obj = self.model._default_manager.filter(
+            **{self.natural_key: value}).first()
+        if obj is None:
+            cache.set(key, MISSING, settings.NEGATIVE_CACHE_TIMEOUT)
+            return None
+        cache.set_many({key: obj.pk, self.pk_key(obj.pk): obj},
+                       self.get_timeout())
+        return obj
+
+    def get_or_404(self, value):
+        obj = self.get(value)
+        if obj is None:
+            raise Http404('No {} matches the given query.'.format(
+                self.model._meta.object_name))
+        return obj
+
+    def forget(self, instance):
+        """Сбрасывает объект, в том числе отрицательную запись его ключа."""
+        cache.delete_many([
+            self.pk_key(instance.pk),
+            self.natural_cache_key(getattr(instance, self.natural_key)),
+        ])
+
+    def forget_many(self, pks):
+        cache.delete_many([self.pk_key(pk) for pk in pks])
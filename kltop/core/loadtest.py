@@ -0,0 +1,181 @@
+"""Нагрузочное тестирование запущенного сервера.
+
+Каждый виртуальный пользователь работает в своем потоке со своей
+сессией requests: входит на сайт и до конца теста выполняет сценарии,
+выбранные случайно с заданными весами. Время каждого запроса
+записывается под именем URL, по ним строится отчет: пропускная
+способность, перцентили задержки и доля ошибок.
+"""
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+from django.urls import reverse
+
+CSRF_INPUT = re.compile(
+    r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+DEFAULT_WEIGHTS = {
+    'browse': 50,
+    'read': 30,
+    'comment': 8,
+    'follow': 7,
+    'create': 5,
+}
+
+
+def percentile(values, q):
+    """Перцентиль q (0-100) отсортированного списка, nearest-rank."""
+    if not values:
+        return None
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, name, seconds, status):
+        with self.lock:
+            self.latencies[name].append(seconds * 1000)
+            self.statuses[name][status] += 1
+
+    def report(self, duration):
+        """Отчет по каждому имени URL и итог, пригодный для JSON."""
+        urls = {}
+        for name in sorted(self.latencies):
+            latencies = sorted(self.latencies[name])
+            statuses = self.statuses[name]
+            errors = sum(count for status, count in statuses.items()
+                         if not isinstance(status, int) or status >= 400)
+            urls[name] = {
+                'requests': len(latencies),
+                'throughput_rps': round(len(latencies) / duration, 2),
+                'errors': errors,
+                'error_rate': round(errors / len(latencies), 4),
+                'latency_ms': {
+                    'p50': round(percentile(latencies, 50), 1),
+                    'p95': round(percentile(latencies, 95), 1),
+                    'p99': round(percentile(latencies, 99), 1),
+                    'max': round(latencies[-1], 1),
+                },
+                'statuses': {str(status): count
+                             for status, count in statuses.items()},
+            }
+        total = sum(url['requests'] for url in urls.values())
+        errors = sum(url['errors'] for url in urls.values())
+        return {
+            'duration_s': round(duration, 2),
+            'requests': total,
+            'throughput_rps': round(total / duration, 2),
+            'error_rate': round(errors / total, 4) if total else 0,
+            'urls': urls,
+        }
+
+
+class VirtualUser:
+    """Пользователь сайта со своей сессией и набором сценариев."""
+
+    def __init__(self, base_url, username, password, data, stats, rng):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.data = data
+        self.stats = stats
+        self.rng = rng
+        self.session = requests.Session()
+
+    def request(self, method, name, args=None, query='', **kwargs):
+        url = self.base_url + reverse(name, args=args) + query
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, allow_redirects=False, timeout=30, **kwargs)
+        except requests.RequestException as error:
+            self.stats.record(name, time.perf_counter() - start,
+                              type(error).__name__)
+            return None
+        self.stats.record(name, time.perf_counter() - start,
+                          response.status_code)
+        return response
+
+    def post_form(self, page, name, args=None, data=None, files=None):
+        """Отправляет форму с CSRF-токеном со страницы page."""
+        match = page is not None and CSRF_INPUT.search(page.text)
+        if not match:
+            return None
+        data = dict(data or {}, csrfmiddlewaretoken=match.group(1))
+        return self.request('POST', name, args, data=data, files=files,
+                            headers={'Referer': page.url})
+
+    def login(self):
+        page = self.request('GET', 'users:login')
+        self.post_form(page, 'users:login', data={
+            'username': self.username, 'password': self.password})
+
+    def browse(self):
+        page = self.rng.randint(1, self.data['pages'])
+        self.request('GET', 'posts:index', query='?page={}'.format(page))
+
+    def read(self):
+        self.request('GET', 'posts:post_detail',
+                     [self.rng.choice(self.data['post_ids'])])
+
+    def comment(self):
+        post_id = self.rng.choice(self.data['post_ids'])
+        page = self.request('GET', 'posts:post_detail', [post_id])
+        self.post_form(page, 'posts:add_comment', [post_id], data={
+            'text': 'Комментарий нагрузочного теста'})
+
+    def follow(self):
+        author = self.rng.choice(self.data['authors'])
+        self.request('GET', 'posts:profile_follow', [author])
+        self.request('GET', 'posts:profile_unfollow', [author])
+
+    def create(self):
+        page = self.request('GET', 'posts:post_create')
+        self.post_form(
+            page, 'posts:post_create',
+            data={'title': 'Нагрузочный тест',
+                  'text': '<p>Статья нагрузочного теста</p>'},
+            files={'image': ('loadtest.gif', SMALL_GIF, 'image/gif')})
+
+    def run(self, weights, deadline):
+        self.login()
+        scenarios = [getattr(self, name) for name in weights]
+        while time.monotonic() < deadline:
+            self.rng.choices(scenarios, list(weights.values()))[0]()
+
+
+def run(base_url, credentials, data, weights, duration, seed=None):
+    """Гоняет по потоку на каждую пару (логин, пароль), возвращает отчет."""
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    rng = random.Random(seed)
+    threads = [
+        threading.Thread(
+            target=VirtualUser(base_url, username, password, data, stats,
+                               random.Random(rng.random())).run,
+            args=(weights, deadline), daemon=True)
+        for username, password in credentials
+    ]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats.report(time.monotonic() - start)
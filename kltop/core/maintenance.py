@@ -0,0 +1,239 @@
+"""Обслуживание базы SQLite по расписанию.
+
+Шаги идут короткими порциями с паузами, а каждая порция фиксируется
+отдельно, поэтому запись блокируется ненадолго и обслуживание можно
+запускать днем. Долгие операции (полный VACUUM, смена журнала) делает
+только однократная подготовка базы в setup().
+
+optimize    ANALYZE таблиц без статистики в sqlite_stat1 или с
+            устаревшей (число строк разошлось больше чем в STALE_FACTOR
+            раз), затем PRAGMA optimize; ANALYZE читает не больше
+            analysis_limit строк каждого индекса;
+sessions    удаление просроченных сессий пачками;
+vacuum      возврат свободных страниц файлу пачками incremental_vacuum
+            (нужен auto_vacuum = INCREMENTAL);
+checkpoint  перенос журнала WAL в базу (нужен journal_mode = WAL);
+check       PRAGMA quick_check или полный integrity_check по таблицам.
+
+Запросы optimize и check SQLite прерывает, когда время шага вышло, и
+шаг отдает unfinished. Проверка по таблицам не смотрит список свободных
+страниц, его проверяет только integrity_check всей базы.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from django.contrib.sessions.models import Session
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+STEPS = ('optimize', 'sessions', 'vacuum', 'checkpoint', 'check')
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+# Сколько строк индекса читает ANALYZE, как советует документация SQLite.
+ANALYSIS_LIMIT = 400
+# Во сколько раз должно разойтись число строк, чтобы пересчитать статистику.
+STALE_FACTOR = 10
+# Через сколько инструкций SQLite проверять, не вышло ли время шага.
+PROGRESS_EVERY = 10000
+INCREMENTAL = 2
+
+
+def pragma(statement):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA {}'.format(statement))
+        return cursor.fetchall()
+
+
+def pragma_value(statement):
+    rows = pragma(statement)
+    return rows[0][0] if rows else None
+
+
+def database_size():
+    return pragma_value('page_count') * pragma_value('page_size')
+
+
+def wal_size():
+    try:
+        return os.path.getsize(connection.settings_dict['NAME'] + '-wal')
+    except (OSError, TypeError):
+        return 0
+
+
+def incremental_vacuum(pages):
+    # execute() модуля sqlite3 делает один шаг запроса, а каждый шаг
+    # incremental_vacuum освобождает одну страницу. executescript
+    # выполняет запрос до конца; открытой транзакции здесь нет.
+    connection.ensure_connection()
+    connection.connection.executescript(
+        'PRAGMA incremental_vacuum({:d})'.format(pages))
+
+
+@contextmanager
+def interrupt_at(deadline):
+    """Прерывает запросы SQLite, выполняемые после deadline.
+
+    Прерванный запрос откатывается и бросает OperationalError, а
+    interrupted() отличает его от других ошибок.
+    """
+    connection.ensure_connection()
+    connection.connection.set_progress_handler(
+        lambda: time.monotonic() >= deadline, PROGRESS_EVERY)
+    try:
+        yield
+    finally:
+        connection.connection.set_progress_handler(None, 0)
+
+
+def interrupted(deadline):
+    return time.monotonic() >= deadline
+
+
+def tables():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                       "AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def row_estimates():
+    """Число строк таблиц по sqlite_stat1: {таблица: строк}."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM sqlite_master "
+                       "WHERE name = 'sqlite_stat1'")
+        if not cursor.fetchone()[0]:
+            return {}
+        cursor.execute('SELECT tbl, stat FROM sqlite_stat1')
+        estimates = {}
+        for table, stat in cursor.fetchall():
+            rows = int(stat.split()[0])
+            estimates[table] = max(rows, estimates.get(table, 0))
+        return estimates
+
+
+def is_stale(estimate, rows):
+    if estimate is None:
+        # Пустым таблицам ANALYZE строку статистики не пишет.
+        return rows > 0
+    return not estimate / STALE_FACTOR <= rows <= estimate * STALE_FACTOR
+
+
+def quote(name):
+    return connection.ops.quote_name(name)
+
+
+def setup():
+    """Переводит базу в WAL и incremental auto_vacuum.
+
+    VACUUM переписывает весь файл и блокирует запись на всё время,
+    поэтому это делается один раз, в окно обслуживания.
+    """
+    pragma('journal_mode = WAL')
+    pragma('auto_vacuum = INCREMENTAL')
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+
+
+class Maintenance:
+    """Шаги обслуживания, каждый не дольше budget секунд."""
+
+    def __init__(self, budget=5, batch_size=500, pause=0.05,
+                 checkpoint_mode='PASSIVE', full_check=False):
+        self.budget = budget
+        self.batch_size = batch_size
+        self.pause = pause
+        self.checkpoint_mode = checkpoint_mode
+        self.full_check = full_check
+
+    def run(self, steps=STEPS):
+        """Выполняет шаги по очереди, отдает отчет о каждом."""
+        for name in steps:
+            size = database_size()
+            start = time.monotonic()
+            details = getattr(self, name)(start + self.budget)
+            yield dict(details, step=name,
+                       seconds=time.monotonic() - start,
+                       reclaimed=size - database_size())
+
+    def optimize(self, deadline):
+        pragma('analysis_limit = {}'.format(ANALYSIS_LIMIT))
+        estimates = row_estimates()
+        analyzed = 0
+        with interrupt_at(deadline), connection.cursor() as cursor:
+            try:
+                for table in tables():
+                    cursor.execute('SELECT count(*) FROM {}'.format(
+                        quote(table)))
+                    if is_stale(estimates.get(table), cursor.fetchone()[0]):
+                        cursor.execute('ANALYZE {}'.format(quote(table)))
+                        analyzed += 1
+                    if interrupted(deadline):
+                        return {'analyzed_tables': analyzed,
+                                'unfinished': True}
+                cursor.execute('PRAGMA optimize')
+            except OperationalError:
+                if not interrupted(deadline):
+                    raise
+                return {'analyzed_tables': analyzed, 'unfinished': True}
+        return {'analyzed_tables': analyzed}
+
+    def sessions(self, deadline):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            keys = list(Session.objects.filter(
+                expire_date__lt=now).values_list('pk', flat=True)[
+                    :self.batch_size])
+            if keys:
+                deleted += Session.objects.filter(pk__in=keys).delete()[0]
+            if len(keys) < self.batch_size:
+                return {'deleted': deleted}
+            if time.monotonic() >= deadline:
+                return {'deleted': deleted, 'unfinished': True}
+            time.sleep(self.pause)
+
+    def vacuum(self, deadline):
+        if pragma_value('auto_vacuum') != INCREMENTAL:
+            return {'skipped': 'auto_vacuum is not INCREMENTAL, run with '
+                               '--setup once',
+                    'free_pages': pragma_value('freelist_count')}
+        initial = free = pragma_value('freelist_count')
+        while free:
+            if time.monotonic() >= deadline:
+                return {'freed_pages': initial - free, 'unfinished': True}
+            incremental_vacuum(min(free, self.batch_size))
+            free = pragma_value('freelist_count')
+            time.sleep(self.pause)
+        return {'freed_pages': initial}
+
+    def checkpoint(self, deadline):
+        if pragma_value('journal_mode') != 'wal':
+            return {'skipped': 'journal_mode is not WAL, run with --setup '
+                               'once'}
+        size = wal_size()
+        busy, frames, moved = pragma('wal_checkpoint({})'.format(
+            self.checkpoint_mode))[0]
+        return {'busy': bool(busy), 'wal_frames': frames,
+                'checkpointed_frames': moved,
+                'wal_truncated': size - wal_size()}
+
+    def check(self, deadline):
+        statement = 'integrity_check' if self.full_check else 'quick_check'
+        report = {'problems': [], 'checked_tables': 0}
+        with interrupt_at(deadline):
+            for table in tables():
+                try:
+                    rows = pragma('{}({})'.format(statement, quote(table)))
+                except OperationalError:
+                    if not interrupted(deadline):
+                        raise
+                    report['unfinished'] = True
+                    break
+                report['problems'] += [row[0] for row in rows
+                                       if row[0] != 'ok']
+                report['checked_tables'] += 1
+                if interrupted(deadline):
+                    report['unfinished'] = True
+                    break
+        report['ok'] = not report['problems']
+        return report
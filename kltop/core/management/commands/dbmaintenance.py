@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import maintenance
+
+
+class Command(BaseCommand):
+    help = ('Обслуживает базу SQLite короткими порциями: статистика '
+            'планировщика, просроченные сессии, свободные страницы, '
+            'журнал WAL и проверка целостности. Запускайте по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'steps', nargs='*',
+            help='Какие шаги выполнить, по умолчанию все: {}.'.format(
+                ', '.join(maintenance.STEPS)))
+        parser.add_argument(
+            '--budget', type=float, default=5,
+            help='Сколько секунд может занять один шаг.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько сессий или страниц обрабатывать за порцию.')
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между порциями, секунд.')
+        parser.add_argument(
+            '--checkpoint-mode', default='PASSIVE',
+            choices=maintenance.CHECKPOINT_MODES,
+            help='Режим wal_checkpoint. PASSIVE не ждет других '
+                 'соединений.')
+        parser.add_argument(
+            '--full-check', action='store_true',
+            help='Полный integrity_check вместо quick_check.')
+        parser.add_argument(
+            '--setup', action='store_true',
+            help='Один раз перевести базу в WAL и incremental '
+                 'auto_vacuum. Делает полный VACUUM с блокировкой записи.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('dbmaintenance supports only SQLite')
+        steps = options['steps'] or maintenance.STEPS
+        unknown = set(steps) - set(maintenance.STEPS)
+        if unknown:
+            raise CommandError('Unknown steps: {}'.format(
+                ', '.join(sorted(unknown))))
+        if options['setup']:
+            size = maintenance.database_size()
+            maintenance.setup()
+            self.stdout.write('Setup done, reclaimed {}'.format(
+                self.size(size - maintenance.database_size())))
+        job = maintenance.Maintenance(
+            budget=options['budget'], batch_size=options['batch_size'],
+            pause=options['pause'],
+            checkpoint_mode=options['checkpoint_mode'],
+            full_check=options['full_check'])
+        total = 0
+        problems = []
+        for report in job.run(steps):
+            total += report['reclaimed']
+            problems += report.get('problems', [])
+            details = ' '.join(
+                '{}={}'.format(key, value)
+                for key, value in sorted(report.items())
+                if key not in ('step', 'seconds', 'reclaimed', 'problems'))
+            self.stdout.write('{:<11} {:>8.3f}s  reclaimed {:>10}  {}'.format(
+                report['step'], report['seconds'],
+                self.size(report['reclaimed']), details).rstrip())
+        self.stdout.write('Reclaimed {} in total'.format(self.size(total)))
+        if problems:
+            raise CommandError('Integrity problems:\n' + '\n'.join(problems))
+
+    def size(self, size):
+        return '{:.1f} KB'.format(size / 1024)
@@ -0,0 +1,112 @@
+import json
+import math
+import secrets
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import loadtest
+from posts.models import Post
+
+User = get_user_model()
+USERNAME = 'loadtest_{}'
+
+
+def parse_weights(value):
+    """'browse=50,read=30' -> {'browse': 50, 'read': 30}."""
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in loadtest.DEFAULT_WEIGHTS or not weight.isdigit():
+            raise CommandError('Неизвестный сценарий или вес: {}'.format(
+                item))
+        weights[name] = int(weight)
+    return weights
+
+
+def loadtest_users():
+    return User.objects.filter(username__startswith=USERNAME.format(''))
+
+
+class Command(BaseCommand):
+    help = ('Нагружает запущенный сервер виртуальными пользователями и '
+            'выводит JSON-отчет по каждому имени URL. Отключите '
+            'RATELIMIT_ENABLED на сервере, иначе запись упрется в лимиты.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Число одновременных пользователей.')
+        parser.add_argument(
+            '--duration', type=float, default=60,
+            help='Длительность теста, секунд.')
+        parser.add_argument(
+            '--weights',
+            default=','.join('{}={}'.format(name, weight) for name, weight
+                             in loadtest.DEFAULT_WEIGHTS.items()),
+            help='Веса сценариев browse, read, comment, follow, create.')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument(
+            '--output', help='Файл для отчета, по умолчанию stdout.')
+        parser.add_argument(
+            '--cleanup', action='store_true',
+            help='Не нагружать, а удалить пользователей loadtest_N вместе '
+                 'с их статьями и комментариями.')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted = loadtest_users().delete()[1].get(User._meta.label, 0)
+            self.stdout.write('Deleted {} users'.format(deleted))
+            return
+        weights = parse_weights(options['weights'])
+        data = self.collect_data()
+        credentials = self.prepare_users(options['users'])
+        try:
+            report = loadtest.run(options['base_url'], credentials, data,
+                                  weights, options['duration'],
+                                  options['seed'])
+        finally:
+            self.disable_users()
+        report['users'] = options['users']
+        report['weights'] = weights
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def prepare_users(self, count):
+        """Включает пользователей loadtest_N со случайным паролем на тест."""
+        password = secrets.token_urlsafe()
+        credentials = []
+        for number in range(count):
+            user, _ = User.objects.get_or_create(
+                username=USERNAME.format(number))
+            user.set_password(password)
+            user.is_active = True
+            user.save()
+            credentials.append((user.username, password))
+        return credentials
+
+    def disable_users(self):
+        """После теста в пользователей loadtest_N войти нельзя."""
+        for user in loadtest_users():
+            user.set_unusable_password()
+            user.is_active = False
+            user.save()
+
+    def collect_data(self):
+        post_ids = list(Post.objects.values_list('pk', flat=True)[:1000])
+        if not post_ids:
+            raise CommandError('Нет статей: заполните базу перед тестом.')
+        authors = list(
+            Post.objects.exclude(author__username__startswith='loadtest_')
+            .values_list('author__username', flat=True).distinct()[:200])
+        return {
+            'post_ids': post_ids,
+            'authors': authors or [USERNAME.format(0)],
+            'pages': math.ceil(Post.objects.count() / settings.PAGI_NUM),
+        }
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from core import prefork
+
+
+class Command(BaseCommand):
+    help = 'Запускает prefork WSGI-сервер с прогревом приложения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bind', default='127.0.0.1:8000',
+            help='Адрес в формате host:port.')
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Число воркеров, по умолчанию считается от числа ядер.')
+        parser.add_argument(
+            '--workers-per-core', type=float, default=2,
+            help='Воркеров на одно ядро процессора.')
+        parser.add_argument(
+            '--max-requests', type=int, default=1000,
+            help='Перезапускать воркер после стольких запросов, 0 - никогда.')
+        parser.add_argument(
+            '--max-requests-jitter', type=int, default=100,
+            help='Случайная добавка к --max-requests, чтобы воркеры '
+                 'не перезапускались одновременно.')
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=30,
+            help='Сколько секунд ждать воркеров при остановке.')
+        parser.add_argument(
+            '--access-log', action='store_true',
+            help='Писать каждый запрос в stderr.')
+
+    def handle(self, *args, **options):
+        host, _, port = options['bind'].rpartition(':')
+        if not port.isdigit():
+            raise CommandError('Укажите --bind в формате host:port.')
+        host = host.strip('[]') or '0.0.0.0'
+        log = self.stdout.write
+        application = get_wsgi_application()
+        prefork.warmup(application, settings.SERVE_WARMUP_URLS, log=log)
+        prefork.Arbiter(
+            application,
+            bind=(host, int(port)),
+            workers=prefork.workers_count(
+                options['workers'], options['workers_per_core']),
+            max_requests=options['max_requests'],
+            max_requests_jitter=options['max_requests_jitter'],
+            graceful_timeout=options['graceful_timeout'],
+            access_log=options['access_log'],
+            log=log,
+        ).run()
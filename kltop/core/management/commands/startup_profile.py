@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+
+
+class Command(BaseCommand):
+    help = ('Показывает, какие модули и пакеты дольше всего импортируются '
+            'при холодном старте.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'manage_args', nargs='*',
+            help='Команда manage.py для профилирования, по умолчанию '
+                 'только django.setup().')
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Сколько строк выводить в каждом разделе.')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Завершиться с ошибкой, если старт дольше '
+                 'STARTUP_TIME_BUDGET.')
+
+    def handle(self, *args, **options):
+        profile = startup.profile_startup(options['manage_args'])
+        top = options['top']
+        total_us = sum(record.self_us for record in profile.imports)
+        self.stdout.write('Wall time: {:.3f}s, imports: {} ({:.3f}s)'.format(
+            profile.wall_time, len(profile.imports), total_us / 1e6))
+
+        self.stdout.write('\nPackages by self time, ms:')
+        for package, self_us in startup.by_package(profile.imports)[:top]:
+            self.stdout.write('{:>10.1f}  {}'.format(self_us / 1e3, package))
+
+        self.stdout.write('\nModules by cumulative time, ms:')
+        # Только импорты верхнего уровня: вложенные уже учтены в них.
+        roots = [record for record in profile.imports if not record.depth]
+        roots.sort(key=lambda record: record.cumulative_us, reverse=True)
+        for record in roots[:top]:
+            self.stdout.write('{:>10.1f}  {}'.format(
+                record.cumulative_us / 1e3, record.name))
+
+        if options['check'] and (
+                profile.wall_time > settings.STARTUP_TIME_BUDGET):
+            raise CommandError('Startup took {:.3f}s, budget is {}s'.format(
+                profile.wall_time, settings.STARTUP_TIME_BUDGET))
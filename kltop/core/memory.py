@@ -0,0 +1,117 @@
+"""Рост памяти по запросам и по воркеру.
+
+С MEMORY_TRACING = True запускается tracemalloc, и для каждого имени
+URL копятся прирост и пик выделенной за запрос памяти. Это замедляет
+запросы, поэтому режим включается на время диагностики. Снимок самых
+больших мест выделения памяти отдает /diagnostics/memory/snapshot/.
+
+Независимо от режима после каждого запроса проверяется RSS процесса:
+если он превысил MEMORY_RSS_LIMIT_MB, prefork-воркер завершается после
+ответа, а мастер запускает новый.
+"""
+import logging
+import os
+import resource
+import threading
+import tracemalloc
+from collections import defaultdict
+
+from django.conf import settings
+
+from . import prefork
+
+logger = logging.getLogger(__name__)
+
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>',
+                 '<frozen importlib._bootstrap_external>')
+
+_lock = threading.Lock()
+_by_url = defaultdict(lambda: {'requests': 0, 'total_delta': 0,
+                               'max_delta': 0, 'max_peak': 0})
+_last_snapshot = None
+
+
+def rss_bytes():
+    """Текущий RSS процесса; без /proc — пиковый из getrusage."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # В Linux ru_maxrss в килобайтах, в macOS в байтах.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def record(name, delta, peak):
+    with _lock:
+        stats = _by_url[name]
+        stats['requests'] += 1
+        stats['total_delta'] += delta
+        stats['max_delta'] = max(stats['max_delta'], delta)
+        stats['max_peak'] = max(stats['max_peak'], peak)
+
+
+def metrics():
+    """Состояние памяти воркера для диагностической страницы."""
+    with _lock:
+        urls = {name: dict(stats, avg_delta=stats['total_delta']
+                           // stats['requests'])
+                for name, stats in sorted(_by_url.items())}
+    traced = None
+    if tracemalloc.is_tracing():
+        traced = tracemalloc.get_traced_memory()[0]
+    return {
+        'pid': os.getpid(),
+        'rss_bytes': rss_bytes(),
+        'rss_limit_bytes': settings.MEMORY_RSS_LIMIT_MB * 1024 * 1024,
+        'tracing': tracemalloc.is_tracing(),
+        'traced_bytes': traced,
+        'urls': urls,
+    }
+
+
+def snapshot(top, compare=False):
+    """Крупнейшие места выделения памяти, или прирост с прошлого снимка."""
+    global _last_snapshot
+    current = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES])
+    if compare and _last_snapshot is not None:
+        statistics = current.compare_to(_last_snapshot, 'traceback')
+    else:
+        statistics = current.statistics('traceback')
+    _last_snapshot = current
+    return [
+        {
+            'size': stat.size,
+            'count': stat.count,
+            'size_diff': getattr(stat, 'size_diff', None),
+            'traceback': stat.traceback.format(),
+        }
+        for stat in statistics[:top]
+    ]
+
+
+class MemoryMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.tracing = settings.MEMORY_TRACING
+        if self.tracing and not tracemalloc.is_tracing():
+            tracemalloc.start(settings.MEMORY_TRACE_FRAMES)
+        self.rss_limit = settings.MEMORY_RSS_LIMIT_MB * 1024 * 1024
+
+    def __call__(self, request):
+        if self.tracing:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        response = self.get_response(request)
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            match = request.resolver_match
+            record(match.view_name if match else 'unresolved',
+                   current - before, peak - before)
+        if self.rss_limit:
+            rss = rss_bytes()
+            if rss > self.rss_limit:
+                logger.warning('RSS %d MB over the limit, recycling worker '
+                               '%d', rss // 2 ** 20, os.getpid())
+                prefork.request_recycle()
+        return response
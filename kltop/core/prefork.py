@@ -0,0 +1,342 @@
+"""Prefork WSGI-сервер для продакшена.
+
+Мастер-процесс один раз импортирует и прогревает приложение, открывает
+сокет и форкает воркеров: прогретая память делится между ними по
+copy-on-write. Воркеры принимают соединения с общего сокета и
+перезапускаются после заданного числа запросов.
+
+Сигналы мастеру:
+    SIGHUP          плавный перезапуск всех воркеров;
+    SIGTERM, SIGINT плавная остановка;
+    SIGQUIT         немедленная остановка.
+"""
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from wsgiref.handlers import SimpleHandler
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+from wsgiref.util import FileWrapper, setup_testing_defaults
+
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+
+# Флаг запрошенного перезапуска текущего воркера, см. request_recycle().
+_recycle_requested = False
+
+
+def request_recycle():
+    """Просит текущий воркер завершиться после ответа на запрос.
+
+    Вне prefork-сервера вызов ни на что не влияет.
+    """
+    global _recycle_requested
+    _recycle_requested = True
+
+
+def workers_count(workers=None, per_core=2):
+    if workers:
+        return workers
+    return max(1, int(round((os.cpu_count() or 1) * per_core)))
+
+
+def compile_templates(log):
+    """Загружает все шаблоны из папок шаблонов в кеш движка."""
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.template_dirs:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if not filename.endswith(('.html', '.txt', '.xml')):
+                        continue
+                    name = os.path.relpath(
+                        os.path.join(root, filename), directory)
+                    try:
+                        engine.get_template(name.replace(os.sep, '/'))
+                    except Exception as error:
+                        log('Template {}: {}'.format(name, error))
+                    else:
+                        compiled += 1
+    return compiled
+
+
+def request_urls(application, urls, log):
+    """Прогоняет GET-запросы через приложение, заполняя кеши."""
+    for url in urls:
+        environ = {'PATH_INFO': url, 'REQUEST_METHOD': 'GET'}
+        setup_testing_defaults(environ)
+        status = []
+        result = application(
+            environ, lambda code, headers, exc_info=None: status.append(code))
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        log('Warmup {}: {}'.format(url, status[0] if status else '-'))
+
+
+def warmup(application, urls=(), log=None):
+    """Прогревает приложение в мастере до форка воркеров."""
+    log = log or (lambda message: None)
+    started = time.monotonic()
+    resolver = get_resolver()
+    # reverse_dict заполняется лениво при первом reverse().
+    resolver.reverse_dict
+    log('URL resolver: {} patterns'.format(len(resolver.url_patterns)))
+    log('Templates compiled: {}'.format(compile_templates(log)))
+
+    for alias in connections:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    log('Databases checked: {}'.format(', '.join(connections)))
+
+    request_urls(application, urls, log)
+    # Соединения с БД не должны переживать fork.
+    connections.close_all()
+    log('Warmup done in {:.2f}s'.format(time.monotonic() - started))
+
+
+class SendfileHandler(SimpleHandler):
+    """Отдает файлы из wsgi.file_wrapper через os.sendfile."""
+
+    wsgi_file_wrapper = FileWrapper
+
+    def sendfile(self):
+        filelike = self.result.filelike
+        try:
+            fd = filelike.fileno()
+            offset = filelike.tell()
+            size = os.fstat(fd).st_size
+        except (AttributeError, OSError, ValueError):
+            return False
+        if not self.headers_sent:
+            self.headers.setdefault('Content-Length', str(size - offset))
+            self.send_headers()
+        self._flush()
+        sock = self.request_handler.connection
+        sock.setblocking(True)
+        while offset < size:
+            sent = os.sendfile(sock.fileno(), fd, offset, size - offset)
+            if not sent:
+                break
+            offset += sent
+            self.bytes_sent += sent
+        return True
+
+    def close(self):
+        try:
+            self.request_handler.log_request(
+                self.status.split(' ', 1)[0], self.bytes_sent)
+        finally:
+            SimpleHandler.close(self)
+
+
+class RequestHandler(WSGIRequestHandler):
+    access_log = False
+
+    def handle(self):
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+        if not self.parse_request():
+            return
+        handler = SendfileHandler(
+            self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=False, multiprocess=True,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+    def log_message(self, format, *args):
+        if self.access_log:
+            super().log_message(format, *args)
+
+
+class PreforkServer(WSGIServer):
+    """WSGIServer поверх уже открытого общего сокета."""
+
+    handled = 0
+
+    def get_request(self):
+        request, client_address = self.socket.accept()
+        request.setblocking(True)
+        return request, client_address
+
+    def process_request(self, request, client_address):
+        self.handled += 1
+        super().process_request(request, client_address)
+
+
+class Worker:
+    """Обслуживает запросы с общего сокета до перезапуска."""
+
+    def __init__(self, listener, application, max_requests, access_log):
+        self.listener = listener
+        self.application = application
+        self.max_requests = max_requests
+        self.access_log = access_log
+        self.alive = True
+
+    def stop(self, signum, frame):
+        self.alive = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        random.seed()
+
+        handler = type('Handler', (RequestHandler,),
+                       {'access_log': self.access_log})
+        server = PreforkServer(self.listener.getsockname()[:2], handler,
+                               bind_and_activate=False)
+        server.socket = self.listener
+        host, port = self.listener.getsockname()[:2]
+        server.server_name = socket.getfqdn(host)
+        server.server_port = port
+        server.setup_environ()
+        server.set_app(self.application)
+        server.timeout = 1
+
+        while self.alive and not _recycle_requested:
+            if self.max_requests and server.handled >= self.max_requests:
+                break
+            server.handle_request()
+        connections.close_all()
+
+
+class Arbiter:
+    """Мастер-процесс: держит нужное число воркеров и обрабатывает сигналы."""
+
+    def __init__(self, application, bind, workers, max_requests=0,
+                 max_requests_jitter=0, graceful_timeout=30, backlog=2048,
+                 access_log=False, log=None):
+        self.application = application
+        self.bind = bind
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.access_log = access_log
+        self.log = log or (lambda message: None)
+        self.children = {}
+        self.signals = []
+        self.listener = None
+
+    def listen(self):
+        host, port = self.bind
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        listener = socket.create_server(
+            (host, port), family=family, backlog=self.backlog)
+        listener.setblocking(False)
+        self.listener = listener
+
+    def spawn(self):
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return pid
+        code = 0
+        try:
+            Worker(self.listener, self.application, max_requests,
+                   self.access_log).run()
+        except BaseException:
+            code = 1
+            import traceback
+            traceback.print_exc()
+        finally:
+            # os._exit() не вызывает atexit: буфер счетчика просмотров
+            # сбрасываем явно.
+            from posts import counters
+            counters.flush()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def signal(self, signum, frame):
+        self.signals.append(signum)
+
+    def kill_all(self, signum, pids=None):
+        for pid in list(pids or self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+    def reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if not pid:
+                return
+            self.children.pop(pid, None)
+            if os.WIFSIGNALED(status) or os.WEXITSTATUS(status):
+                self.log('Worker {} exited with status {}'.format(
+                    pid, status))
+
+    def wait_children(self, pids, timeout):
+        deadline = time.monotonic() + timeout
+        while any(pid in self.children for pid in pids):
+            if time.monotonic() > deadline:
+                self.kill_all(signal.SIGKILL,
+                              [pid for pid in pids if pid in self.children])
+            self.reap()
+            time.sleep(0.1)
+
+    def reload(self):
+        old = list(self.children)
+        for _ in range(self.workers):
+            self.spawn()
+        self.kill_all(signal.SIGTERM, old)
+        self.log('Reloading {} workers'.format(len(old)))
+
+    def run(self):
+        self.listen()
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT,
+                       signal.SIGQUIT, signal.SIGCHLD):
+            signal.signal(signum, self.signal)
+        host, port = self.listener.getsockname()[:2]
+        self.log('Listening at http://{}:{} with {} workers (pid {})'.format(
+            host, port, self.workers, os.getpid()))
+        try:
+            while True:
+                self.reap()
+                while self.signals:
+                    signum = self.signals.pop(0)
+                    if signum == signal.SIGHUP:
+                        self.reload()
+                    elif signum in (signal.SIGTERM, signal.SIGINT):
+                        self.log('Graceful shutdown')
+                        pids = list(self.children)
+                        self.kill_all(signal.SIGTERM)
+                        self.wait_children(pids, self.graceful_timeout)
+                        return
+                    elif signum == signal.SIGQUIT:
+                        self.kill_all(signal.SIGKILL)
+                        return
+                while len(self.children) < self.workers:
+                    self.spawn()
+                time.sleep(0.5)
+        finally:
+            self.reap()
+            self.listener.close()
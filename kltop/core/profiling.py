@@ -0,0 +1,131 @@
+"""Сэмплирующий профилировщик запросов.
+
+Пока запрос выполняется, отдельный поток раз в PROFILING_INTERVAL
+секунд снимает стек потока запроса через sys._current_frames(). Стеки
+сохраняются в формате collapsed stacks ("a;b;c 42"), который понимают
+flamegraph.pl и speedscope. В каталоге PROFILING_DIR хранятся только
+PROFILING_MAX_FILES последних профилей.
+
+Профилируются запросы сотрудников с заголовком X-Profile: 1 или
+параметром ?_profile=1, а также случайная доля PROFILING_SAMPLE_RATE
+всех запросов.
+"""
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+PROFILE_NAME = re.compile(r'^[\w.-]+\.folded$')
+SITE_PACKAGES = 'site-packages' + os.sep
+
+
+def frame_name(code):
+    """Короткое имя функции: путь в проекте или в site-packages."""
+    filename = code.co_filename
+    if SITE_PACKAGES in filename:
+        filename = filename.split(SITE_PACKAGES, 1)[1]
+    elif filename.startswith(str(settings.BASE_DIR)):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    return '{}:{}'.format(filename, code.co_name)
+
+
+def collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler(threading.Thread):
+    """Поток, который снимает стеки другого потока до вызова stop()."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+def profile_files():
+    """Сохраненные профили, новые первыми: (имя, размер, время записи)."""
+    try:
+        entries = list(os.scandir(settings.PROFILING_DIR))
+    except FileNotFoundError:
+        return []
+    files = [(entry.name, entry.stat().st_size,
+              datetime.fromtimestamp(entry.stat().st_mtime, timezone.utc))
+             for entry in entries if PROFILE_NAME.match(entry.name)]
+    files.sort(key=lambda item: item[2], reverse=True)
+    return files
+
+
+def save_profile(stacks, label):
+    """Пишет профиль и удаляет лишние старые, возвращает имя файла."""
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    now = time.time()
+    name = '{}.{:03d}-{}-{}.folded'.format(
+        time.strftime('%Y%m%d-%H%M%S', time.localtime(now)),
+        int(now * 1000) % 1000, os.getpid(),
+        re.sub(r'[^\w.-]', '_', label))
+    with open(os.path.join(settings.PROFILING_DIR, name), 'w') as file:
+        for stack, count in stacks.most_common():
+            file.write('{} {}\n'.format(stack, count))
+    for old, _, _ in profile_files()[settings.PROFILING_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(settings.PROFILING_DIR, old))
+        except FileNotFoundError:
+            pass
+    return name
+
+
+def requested(request):
+    flag = (request.META.get('HTTP_X_PROFILE') == '1'
+            or request.GET.get('_profile') == '1')
+    return flag and request.user.is_staff
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        explicit = requested(request)
+        if not explicit and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        sampler = Sampler(threading.get_ident(), settings.PROFILING_INTERVAL)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+        if not stacks:
+            # Запрос короче интервала сэмплирования.
+            return response
+        match = request.resolver_match
+        label = '{}-{:.0f}ms'.format(
+            match.view_name if match else 'unresolved',
+            (time.perf_counter() - start) * 1000)
+        name = save_profile(stacks, label)
+        if explicit:
+            response['X-Profile'] = name
+        return response
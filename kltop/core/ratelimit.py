@@ -0,0 +1,79 @@
+"""Ограничение частоты запросов на запись.
+
+Для каждого имени URL из RATELIMITS заводятся token bucket на
+пользователя и на IP-адрес. Корзина хранится в общем кеше, поэтому лимит
+действует на все воркеры сразу. Чтение, пополнение и списание токена
+идут под блокировкой ключа (FileBasedCache.lock()), поэтому два
+одновременных запроса не возьмут один и тот же токен. У кешей без
+lock() блокировки нет, см. проверку core.W002.
+Запросы к остальным URL проходят после одного поиска в словаре.
+"""
+import math
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): емкость корзины и период в секундах."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def locked(key):
+    lock = getattr(cache, 'lock', None)
+    return lock(key) if lock else nullcontext()
+
+
+def take_token(key, rate, now=None):
+    """Берет токен из корзины, возвращает 0 или секунды до следующего."""
+    capacity, period = parse_rate(rate)
+    with locked(key):
+        now = time.time() if now is None else now
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * capacity / period)
+        if tokens < 1:
+            cache.set(key, (tokens, now), period)
+            return (1 - tokens) * period / capacity
+        cache.set(key, (tokens - 1, now), period)
+        return 0
+
+
+def client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and settings.RATELIMIT_TRUST_X_FORWARDED_FOR:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.rules = settings.RATELIMITS if settings.RATELIMIT_ENABLED else {}
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        rule = self.rules.get(request.resolver_match.view_name)
+        if rule is None or request.method not in rule['methods']:
+            return None
+        view_name = request.resolver_match.view_name
+        buckets = [('ip', client_ip(request), rule['ip'])]
+        if request.user.is_authenticated and 'user' in rule:
+            buckets.append(('user', request.user.pk, rule['user']))
+        wait = max(
+            take_token('ratelimit:{}:{}:{}'.format(view_name, kind, ident),
+                       rate)
+            for kind, ident, rate in buckets
+        )
+        if not wait:
+            return None
+        response = render(request, 'core/429.html', status=429)
+        response['Retry-After'] = math.ceil(wait)
+        return response
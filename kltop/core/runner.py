@@ -0,0 +1,38 @@
+"""Запуск тестов с собственным кешем.
+
+Кеш по умолчанию лежит в каталоге на диске, общем для всех процессов
+сайта, а тесты вызывают cache.clear(). Чтобы тесты на той же машине не
+стирали сессии, лимиты и версии лент работающего сайта, им отдается
+пустой временный каталог.
+"""
+import copy
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def isolated_cache():
+    location = tempfile.mkdtemp(prefix='kltop-test-cache-')
+    caches = copy.deepcopy(settings.CACHES)
+    caches['default']['LOCATION'] = location
+    try:
+        with override_settings(CACHES=caches):
+            yield
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache = isolated_cache()
+        self.cache.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
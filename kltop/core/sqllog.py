@@ -0,0 +1,132 @@
+"""Журнал медленных SQL-запросов с местом в коде, откуда они пришли.
+
+Обертка из connection.execute_wrapper ставится на каждое новое
+соединение. Запрос дольше SLOW_QUERY_THRESHOLD_MS пишется в логгер
+core.sqllog (в настройках это ротируемый файл) вместе с формой
+параметров, числом строк, ближайшей функцией проекта и строкой шаблона,
+при отрисовке которой он выполнен. Одинаковые запросы с разными
+значениями сводятся к одному отпечатку, статистику по отпечаткам
+воркера отдает /diagnostics/slow-queries/.
+"""
+import hashlib
+import logging
+import re
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACES = re.compile(r'\s+')
+# Функции проекта ищутся вне этого модуля и вне чужих пакетов.
+SKIPPED = (__file__, 'site-packages')
+
+_lock = threading.Lock()
+_fingerprints = {}
+
+
+def fingerprint(sql):
+    """SQL без значений: литералы и списки IN (...) заменены на ?."""
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql.replace('%s', '?'))
+    sql = IN_LIST.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def fingerprint_id(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def params_shape(params, many):
+    """Типы параметров без значений: 'int, str' или 'int x 500'."""
+    if many:
+        params = list(params)
+        return '{} rows of ({})'.format(
+            len(params), params_shape(params[0], False) if params else '')
+    if not params:
+        return ''
+    if isinstance(params, dict):
+        params = params.values()
+    names = [type(param).__name__ for param in params]
+    if len(set(names)) == 1 and len(names) > 3:
+        return '{} x {}'.format(names[0], len(names))
+    return ', '.join(names)
+
+
+def origin():
+    """(функция проекта, строка шаблона) для текущего стека."""
+    code_site = template_site = None
+    frame = sys._getframe(1)
+    while frame is not None and not (code_site and template_site):
+        code = frame.f_code
+        if (template_site is None and code.co_name == 'render_annotated'
+                and 'self' in frame.f_locals):
+            node = frame.f_locals['self']
+            template = getattr(node, 'origin', None)
+            if template is not None:
+                template_site = '{}:{}'.format(
+                    template.template_name, node.token.lineno)
+        elif (code_site is None
+              and code.co_filename.startswith(str(settings.BASE_DIR))
+              and not any(part in code.co_filename for part in SKIPPED)):
+            code_site = '{}:{} in {}'.format(
+                code.co_filename[len(str(settings.BASE_DIR)) + 1:],
+                frame.f_lineno, code.co_name)
+        frame = frame.f_back
+    return code_site, template_site
+
+
+def record(normalized, duration, code_site, template_site):
+    with _lock:
+        stats = _fingerprints.get(normalized)
+        if stats is None:
+            stats = _fingerprints[normalized] = {
+                'id': fingerprint_id(normalized), 'sql': normalized,
+                'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'sites': {}}
+        stats['count'] += 1
+        stats['total_ms'] += duration
+        stats['max_ms'] = max(stats['max_ms'], duration)
+        site = ' / '.join(filter(None, (code_site, template_site))) or '?'
+        stats['sites'][site] = stats['sites'].get(site, 0) + 1
+        return stats['id'], stats['count']
+
+
+def summary():
+    """Отпечатки медленных запросов воркера, самые затратные первыми."""
+    with _lock:
+        items = [dict(stats, sites=dict(stats['sites']))
+                 for stats in _fingerprints.values()]
+    return sorted(items, key=lambda stats: stats['total_ms'], reverse=True)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - start) * 1000
+        if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+            log_query(sql, params, many, context, duration)
+
+
+def log_query(sql, params, many, context, duration):
+    normalized = fingerprint(sql)
+    code_site, template_site = origin()
+    query_id, count = record(normalized, duration, code_site, template_site)
+    rows = getattr(context['cursor'], 'rowcount', -1)
+    logger.warning(
+        '%.1fms [%s #%d] rows=%s params=(%s) at %s template=%s: %s',
+        duration, query_id, count, rows if rows >= 0 else '?',
+        params_shape(params, many), code_site or '?', template_site or '-',
+        sql)
+
+
+def install(connection, **kwargs):
+    """Обработчик connection_created: ставит обертку на соединение."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
@@ -0,0 +1,76 @@
+"""Профиль холодного старта по данным ``python -X importtime``."""
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+
+SETUP_CODE = 'import django; django.setup()'
+LOADED_CODE = SETUP_CODE + (
+    '; import sys; print(*set(sys.argv[1:]) & set(sys.modules))')
+
+ImportRecord = namedtuple('ImportRecord', 'name self_us cumulative_us depth')
+StartupProfile = namedtuple('StartupProfile', 'wall_time imports')
+
+
+def parse_importtime(output):
+    """Разбирает строки вида ``import time: self | cumulative | name``."""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        records.append(ImportRecord(
+            name=name.strip(),
+            self_us=int(fields[0]),
+            cumulative_us=int(fields[1]),
+            depth=(len(name) - len(name.lstrip())) // 2,
+        ))
+    return records
+
+
+def environment():
+    return dict(os.environ, DJANGO_SETTINGS_MODULE='kltop.settings')
+
+
+def profile_startup(command=None):
+    """Запускает django.setup() или команду manage.py в новом процессе.
+
+    Возвращает время работы процесса и список импортов.
+    """
+    if command:
+        args = [sys.executable, '-X', 'importtime',
+                os.path.join(settings.BASE_DIR, 'manage.py')] + list(command)
+    else:
+        args = [sys.executable, '-X', 'importtime', '-c', SETUP_CODE]
+    started = time.perf_counter()
+    process = subprocess.run(
+        args, cwd=settings.BASE_DIR, env=environment(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    wall_time = time.perf_counter() - started
+    return StartupProfile(wall_time, parse_importtime(process.stderr))
+
+
+def by_package(imports):
+    """Суммарное собственное время импорта по пакетам верхнего уровня."""
+    totals = defaultdict(int)
+    for record in imports:
+        totals[record.name.split('.')[0]] += record.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def loaded_after_setup(modules):
+    """Те из modules, что оказались в sys.modules после django.setup()."""
+    process = subprocess.run(
+        [sys.executable, '-c', LOADED_CODE] + list(modules),
+        cwd=settings.BASE_DIR, env=environment(), check=True,
+        stdout=subprocess.PIPE, universal_newlines=True,
+    )
+    return process.stdout.split()
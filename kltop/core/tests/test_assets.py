@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = b'0123456789' * 10
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class AssetsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Кладем файл во временную папку медиа."""
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'))
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'a.txt'), 'wb') as f:
+            f.write(CONTENT)
+        cls.MEDIA_URL = settings.MEDIA_URL + 'posts/a.txt'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_media_served_with_cache_headers(self):
+        """Медиа отдается целиком с ETag и Cache-Control."""
+        response = self.client.get(self.MEDIA_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertTrue(response['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        """Совпадающий If-None-Match дает 304."""
+        etag = self.client.get(self.MEDIA_URL)['ETag']
+        response = self.client.get(self.MEDIA_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_request(self):
+        """Range отдает только запрошенный диапазон."""
+        ranges = {
+            'bytes=10-19': (CONTENT[10:20], 'bytes 10-19/100'),
+            'bytes=95-': (CONTENT[95:], 'bytes 95-99/100'),
+            'bytes=-5': (CONTENT[-5:], 'bytes 95-99/100'),
+        }
+        for header, (body, content_range) in ranges.items():
+            with self.subTest(header=header):
+                response = self.client.get(self.MEDIA_URL, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Range'], content_range)
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за пределами файла дает 416."""
+        response = self.client.get(self.MEDIA_URL, HTTP_RANGE='bytes=200-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_missing_file(self):
+        response = self.client.get(settings.MEDIA_URL + 'posts/none.txt')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,41 @@
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import FileBasedCache
+from core.checks import ratelimit_lock_check, shared_cache_check
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class SharedCacheTests(SimpleTestCase):
+    def test_visible_to_other_processes(self):
+        """Запись и её удаление видны кешу другого воркера."""
+        other = FileBasedCache(settings.CACHES['default']['LOCATION'], {})
+        cache.set('shared-cache-test', 1)
+        self.assertEqual(other.get('shared-cache-test'), 1)
+        other.delete('shared-cache-test')
+        self.assertIsNone(cache.get('shared-cache-test'))
+
+    def test_tests_use_own_cache(self):
+        """cache.clear() в тестах не стирает кеш работающего сайта."""
+        self.assertNotEqual(
+            os.path.realpath(settings.CACHES['default']['LOCATION']),
+            os.path.join(os.path.realpath(settings.BASE_DIR), 'cache'))
+
+    def test_process_local_cache_warning(self):
+        self.assertEqual(shared_cache_check(None), [])
+        with override_settings(CACHES=LOCMEM):
+            self.assertEqual(
+                [warning.id for warning in shared_cache_check(None)],
+                ['core.W001'])
+
+    def test_ratelimit_lock_warning(self):
+        self.assertEqual(ratelimit_lock_check(None), [])
+        with override_settings(CACHES=LOCMEM, RATELIMIT_ENABLED=True):
+            self.assertEqual(
+                [warning.id for warning in ratelimit_lock_check(None)],
+                ['core.W002'])
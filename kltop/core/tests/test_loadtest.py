@@ -0,0 +1,68 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from ..loadtest import Stats, percentile
+
+User = get_user_model()
+
+
+class LoadtestReportTests(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_report(self):
+        """Ошибки считаются по кодам от 400 и по исключениям."""
+        stats = Stats()
+        for _ in range(8):
+            stats.record('posts:index', 0.01, 200)
+        stats.record('posts:index', 0.5, 500)
+        stats.record('posts:index', 1.0, 'ConnectionError')
+        report = stats.report(duration=2)
+        index = report['urls']['posts:index']
+        self.assertEqual(report['requests'], 10)
+        self.assertEqual(report['throughput_rps'], 5)
+        self.assertEqual(index['errors'], 2)
+        self.assertEqual(index['error_rate'], 0.2)
+        self.assertEqual(index['latency_ms']['p50'], 10)
+        self.assertEqual(index['latency_ms']['max'], 1000)
+        self.assertEqual(index['statuses'], {
+            '200': 8, '500': 1, 'ConnectionError': 1})
+
+
+class LoadtestUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        author.posts.create(text='Текст')
+
+    def test_users_disabled_after_run(self):
+        """Пароль случайный на каждый тест, после теста войти нельзя."""
+        passwords = []
+
+        def run(base_url, credentials, *args):
+            passwords.extend(password for _, password in credentials)
+            for username, password in credentials:
+                self.assertIsNotNone(authenticate(username=username,
+                                                  password=password))
+            return {}
+
+        with mock.patch('core.loadtest.run', side_effect=run):
+            for _ in range(2):
+                call_command('loadtest', '--users', '2', stdout=StringIO())
+        self.assertEqual(len(set(passwords)), 2)
+        for user in User.objects.filter(username__startswith='loadtest_'):
+            self.assertFalse(user.is_active)
+            self.assertFalse(user.has_usable_password())
+        out = StringIO()
+        call_command('loadtest', '--cleanup', stdout=out)
+        self.assertEqual(out.getvalue().strip(), 'Deleted 2 users')
+        self.assertFalse(User.objects.filter(
+            username__startswith='loadtest_').exists())
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..maintenance import Maintenance, interrupt_at, row_estimates, tables
+
+
+class MaintenanceTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(session_key='expired{}'.format(number),
+                    session_data='', expire_date=now - timedelta(days=1))
+            for number in range(5))
+        Session.objects.create(session_key='alive', session_data='',
+                               expire_date=now + timedelta(days=1))
+
+    def test_sessions_deleted_in_batches(self):
+        """Просроченные сессии удаляются пачками, живые остаются."""
+        job = Maintenance(batch_size=2, pause=0)
+        report, = job.run(['sessions'])
+        self.assertEqual(report['deleted'], 5)
+        self.assertNotIn('unfinished', report)
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)),
+                         ['alive'])
+
+    def test_sessions_stop_at_budget(self):
+        """Шаг останавливается, когда истекло его время."""
+        job = Maintenance(budget=0, batch_size=2, pause=0)
+        report, = job.run(['sessions'])
+        self.assertEqual(report['deleted'], 2)
+        self.assertTrue(report['unfinished'])
+
+    def test_optimize_analyzes_missing_and_stale(self):
+        """ANALYZE идет по таблицам без статистики и с устаревшей."""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS sqlite_stat1')
+        job = Maintenance(pause=0)
+        report, = job.run(['optimize'])
+        self.assertGreaterEqual(report['analyzed_tables'], 1)
+        self.assertIn('django_session', row_estimates())
+        report, = job.run(['optimize'])
+        self.assertEqual(report['analyzed_tables'], 0)
+        Session.objects.bulk_create(
+            Session(session_key='new{}'.format(number), session_data='',
+                    expire_date=timezone.now())
+            for number in range(100))
+        report, = job.run(['optimize'])
+        self.assertEqual(report['analyzed_tables'], 1)
+
+    def test_optimize_and_check_stop_at_budget(self):
+        """optimize и check по таблицам останавливаются по времени."""
+        job = Maintenance(budget=0, pause=0)
+        optimize, check = job.run(['optimize', 'check'])
+        self.assertTrue(optimize['unfinished'])
+        self.assertTrue(check['unfinished'])
+        self.assertLess(check['checked_tables'], len(tables()))
+
+    def test_query_interrupted_after_deadline(self):
+        """Запрос, который не уложился во время шага, прерывается."""
+        with interrupt_at(time.monotonic()), \
+                self.assertRaises(OperationalError):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL '
+                    'SELECT i + 1 FROM n) SELECT count(*) FROM n')
+
+    def test_command_reports_every_step(self):
+        """Команда пишет время и освобожденное место по каждому шагу."""
+        out = StringIO()
+        call_command('dbmaintenance', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[:-1]],
+                         ['optimize', 'sessions', 'vacuum', 'checkpoint',
+                          'check'])
+        self.assertIn('deleted=5', lines[1])
+        self.assertIn('ok=True', lines[4])
+        self.assertTrue(lines[-1].startswith('Reclaimed'))
+        with self.assertRaises(CommandError):
+            call_command('dbmaintenance', 'defrag', stdout=out)
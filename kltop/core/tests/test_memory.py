@@ -0,0 +1,64 @@
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import memory, prefork
+
+User = get_user_model()
+KEEP = []
+
+
+def leaky_view(request):
+    KEEP.append(bytearray(1024 * 1024))
+    return HttpResponse('ok')
+
+
+class MemoryTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        memory._by_url.clear()
+        self.addCleanup(memory._by_url.clear)
+        self.addCleanup(KEEP.clear)
+
+    @override_settings(MEMORY_TRACING=True, MEMORY_RSS_LIMIT_MB=0)
+    def test_delta_recorded_per_url(self):
+        was_tracing = tracemalloc.is_tracing()
+        middleware = memory.MemoryMiddleware(leaky_view)
+        if not was_tracing:
+            self.addCleanup(tracemalloc.stop)
+        middleware(self.factory.get('/'))
+        stats = memory.metrics()['urls']['unresolved']
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreaterEqual(stats['max_delta'], 1024 * 1024)
+        sites = memory.snapshot(top=5)
+        self.assertTrue(any('test_memory.py' in line for site in sites
+                            for line in site['traceback']))
+
+    @override_settings(MEMORY_RSS_LIMIT_MB=1)
+    def test_worker_recycled_over_rss_limit(self):
+        self.addCleanup(setattr, prefork, '_recycle_requested', False)
+        with self.assertLogs('core.memory', 'WARNING'):
+            memory.MemoryMiddleware(leaky_view)(self.factory.get('/'))
+        self.assertTrue(prefork._recycle_requested)
+
+    def test_metrics_for_staff_only(self):
+        url = reverse('core:memory_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertGreater(self.client.get(url).json()['rss_bytes'], 0)
+
+    def test_snapshot_ignores_bad_top(self):
+        """Нечисловой ?top= заменяется значением по умолчанию."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.addCleanup(tracemalloc.stop)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('core:memory_snapshot'),
+                                   {'top': 'abc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('top', response.json())
@@ -0,0 +1,20 @@
+from django.core.wsgi import get_wsgi_application
+from django.test import TestCase
+
+from core import prefork
+
+
+class PreforkTests(TestCase):
+    def test_workers_count(self):
+        """Явное число воркеров важнее расчета по ядрам."""
+        self.assertEqual(prefork.workers_count(workers=3), 3)
+        self.assertGreaterEqual(prefork.workers_count(per_core=0.01), 1)
+
+    def test_warmup(self):
+        """Прогрев проходит по шаблонам и адресам без ошибок."""
+        messages = []
+        prefork.warmup(get_wsgi_application(), ['/about/tech/'],
+                       log=messages.append)
+        self.assertIn('Warmup /about/tech/: 200 OK', messages)
+        self.assertFalse(any(
+            message.startswith('Template ') for message in messages))
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.template.defaultfilters import date
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..profiling import ProfilingMiddleware, Sampler, save_profile
+
+User = get_user_model()
+PROFILING_DIR = tempfile.mkdtemp()
+
+
+def slow_view(request):
+    time.sleep(0.05)
+    return HttpResponse('ok')
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR, PROFILING_INTERVAL=0.001,
+                   PROFILING_SAMPLE_RATE=0, PROFILING_MAX_FILES=3)
+class ProfilingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        for name in os.listdir(PROFILING_DIR):
+            os.remove(os.path.join(PROFILING_DIR, name))
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.factory = RequestFactory()
+
+    def test_sampler_collects_stacks(self):
+        sampler = Sampler(threading.get_ident(), 0.001)
+        sampler.start()
+        slow_view(None)
+        stacks = sampler.stop()
+        self.assertTrue(any('test_profiling.py:slow_view' in stack
+                            for stack in stacks))
+
+    def test_staff_header_profiles_request(self):
+        request = self.factory.get('/', HTTP_X_PROFILE='1')
+        request.user = self.staff
+        response = ProfilingMiddleware(slow_view)(request)
+        name = response['X-Profile']
+        with open(os.path.join(PROFILING_DIR, name)) as file:
+            stack, count = file.readline().rsplit(' ', 1)
+        self.assertIn('slow_view', stack)
+        self.assertGreater(int(count), 0)
+
+    def test_anonymous_header_ignored(self):
+        request = self.factory.get('/', HTTP_X_PROFILE='1')
+        request.user = AnonymousUser()
+        response = ProfilingMiddleware(slow_view)(request)
+        self.assertFalse(response.has_header('X-Profile'))
+        self.assertEqual(os.listdir(PROFILING_DIR), [])
+
+    def test_directory_bounded(self):
+        for number in range(5):
+            save_profile(Counter({'a;b': 1}), 'view{}'.format(number))
+        self.assertEqual(len(os.listdir(PROFILING_DIR)), 3)
+
+    def test_list_and_download_for_staff_only(self):
+        name = save_profile(Counter({'a;b': 2}), 'posts:index')
+        list_url = reverse('core:profile_list')
+        download_url = reverse('core:profile_download', args=[name])
+        self.assertEqual(self.client.get(list_url).status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(list_url)
+        self.assertContains(response, name)
+        self.assertContains(response, date(timezone.localtime(), 'd E Y'))
+        response = self.client.get(download_url)
+        self.assertEqual(b''.join(response.streaming_content), b'a;b 2\n')
+        response = self.client.get(
+            reverse('core:profile_download', args=['..evil']))
+        self.assertEqual(response.status_code, 404)
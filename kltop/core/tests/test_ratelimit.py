@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import take_token
+
+User = get_user_model()
+RATELIMITS = {
+    'posts:profile_follow': {
+        'methods': ('GET',), 'user': '2/m', 'ip': '100/m'},
+}
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_over_time(self):
+        """Корзина пустеет и пополняется со скоростью лимита."""
+        self.assertEqual(take_token('bucket', '2/m', now=0), 0)
+        self.assertEqual(take_token('bucket', '2/m', now=0), 0)
+        self.assertEqual(take_token('bucket', '2/m', now=0), 30)
+        self.assertEqual(take_token('bucket', '2/m', now=30), 0)
+
+    def test_concurrent_requests_take_each_token_once(self):
+        """Одновременные запросы не берут токенов сверх емкости."""
+        with ThreadPoolExecutor(8) as pool:
+            waits = list(pool.map(
+                lambda _: take_token('bucket', '5/h', now=0), range(20)))
+        self.assertEqual(waits.count(0), 5)
+
+
+@override_settings(RATELIMITS=RATELIMITS)
+class RateLimitMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.FOLLOW_REV = reverse('posts:profile_follow',
+                                 kwargs={'username': cls.author.username})
+
+    def setUp(self):
+        cache.clear()
+
+    def test_limit_returns_429(self):
+        """Сверх лимита отвечаем 429 с Retry-After."""
+        for _ in range(2):
+            response = self.authorized_client.get(self.FOLLOW_REV)
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.get(self.FOLLOW_REV)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertTemplateUsed(response, 'core/429.html')
+
+    def test_other_urls_not_limited(self):
+        for _ in range(5):
+            response = self.authorized_client.get(reverse('posts:index'))
+            self.assertEqual(response.status_code, 200)
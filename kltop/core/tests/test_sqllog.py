@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from .. import sqllog
+
+User = get_user_model()
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_values_removed(self):
+        self.assertEqual(
+            sqllog.fingerprint(
+                "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'it''s'"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ?')
+        self.assertEqual(
+            sqllog.fingerprint('SELECT *\n FROM t WHERE id IN (%s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)')
+
+    def test_params_shape(self):
+        self.assertEqual(sqllog.params_shape((1, 'a'), False), 'int, str')
+        self.assertEqual(sqllog.params_shape(list(range(10)), False),
+                         'int x 10')
+        self.assertEqual(sqllog.params_shape([(1,), (2,)], True),
+                         '2 rows of (int)')
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+        Comment.objects.create(post=cls.post, author=cls.user, text='Да')
+
+    def setUp(self):
+        sqllog._fingerprints.clear()
+        self.addCleanup(sqllog._fingerprints.clear)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_queries_attributed_to_view_and_template(self):
+        self.assertIn(sqllog.slow_query_wrapper, connection.execute_wrappers)
+        with self.assertLogs('core.sqllog', 'WARNING') as logs:
+            self.client.get(reverse('posts:post_detail', args=[self.post.pk]))
+        output = '\n'.join(logs.output)
+        self.assertIn('at posts/views.py:', output)
+        self.assertIn('template=posts/post_detail.html:', output)
+        followers = [stats for stats in sqllog.summary()
+                     if 'posts_follow' in stats['sql']]
+        self.assertTrue(any('posts/post_detail.html' in site
+                            for site in followers[0]['sites']))
@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from core import startup
+
+# Тяжелые модули, которые не должны загружаться при django.setup().
+HEAVY_MODULES = (
+    'PIL.Image',
+    'django_summernote.forms',
+    'django_summernote.widgets',
+    'posts.admin',
+    'posts.forms',
+)
+
+
+class StartupTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        300 |   django.utils\n'
+            'import time:        80 |        380 | django\n'
+        )
+        records = startup.parse_importtime(output)
+        self.assertEqual([record.name for record in records],
+                         ['django.utils', 'django'])
+        self.assertEqual([record.depth for record in records], [1, 0])
+        self.assertEqual(startup.by_package(records), [('django', 200)])
+
+    def test_heavy_modules_deferred(self):
+        """django.setup() не загружает тяжелые модули.
+
+        Время старта здесь не проверяется: оно зависит от машины, его
+        сверяет с бюджетом команда startup_profile --check.
+        """
+        self.assertEqual(startup.loaded_after_setup(HEAVY_MODULES), [])
+        self.assertEqual(startup.loaded_after_setup(['django.db']),
+                         ['django.db'])
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<str:name>/', views.profile_download,
+         name='profile_download'),
+    path('memory/', views.memory_metrics, name='memory_metrics'),
+    path('memory/snapshot/', views.memory_snapshot,
+         name='memory_snapshot'),
+    path('slow-queries/', views.slow_queries, name='slow_queries'),
+]
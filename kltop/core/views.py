@@ -1,5 +1,12 @@
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import render
 
+from . import memory, profiling, sqllog
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +22,51 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+@staff_member_required
+def profile_list(request):
+    context = {
+        'title': 'Профили запросов',
+        'profiles': profiling.profile_files(),
+    }
+    return render(request, 'core/profiles.html', context)
+
+
+@staff_member_required
+def profile_download(request, name):
+    if not profiling.PROFILE_NAME.match(name):
+        raise Http404
+    try:
+        file = open(os.path.join(settings.PROFILING_DIR, name), 'rb')
+    except FileNotFoundError:
+        raise Http404
+    return FileResponse(file, as_attachment=True, filename=name,
+                        content_type='text/plain')
+
+
+@staff_member_required
+def memory_metrics(request):
+    return JsonResponse(memory.metrics())
+
+
+@staff_member_required
+def memory_snapshot(request):
+    if not memory.tracemalloc.is_tracing():
+        return JsonResponse(
+            {'error': 'Включите MEMORY_TRACING, чтобы снимать снимки.'},
+            status=409)
+    try:
+        top = int(request.GET.get('top', settings.MEMORY_SNAPSHOT_TOP))
+    except ValueError:
+        top = settings.MEMORY_SNAPSHOT_TOP
+    return JsonResponse({
+        'pid': os.getpid(),
+        'top': memory.snapshot(top, compare='compare' in request.GET),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@staff_member_required
+def slow_queries(request):
+    return JsonResponse({'pid': os.getpid(), 'queries': sqllog.summary()},
+                        json_dumps_params={'ensure_ascii': False})
@@ -38,6 +38,39 @@ ALLOWED_HOSTS = [
 # Number of pages for Paginator
 PAGI_NUM = 10
 
+# Рекомендации авторов: сколько считать и сколько показывать
+FOLLOW_SUGGESTIONS_TOP_K = 10
+FOLLOW_SUGGESTIONS_NUM = 5
+
+# Похожие статьи: сколько хранить и где лежит индекс TF-IDF
+RELATED_POSTS_TOP_K = 5
+RELATED_POSTS_INDEX = os.path.join(BASE_DIR, 'related_posts.npz')
+
+# Сколько секунд хранить ленту RSS/Atom, если в ней не было записей
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сколько секунд хранить число статей ленты для паджинатора
+COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сколько секунд хранить версию области кеша (лента, группа, автор).
+# Истекшая версия заменяется новой, старые записи просто не читаются
+SCOPE_VERSION_TIMEOUT = 60 * 60 * 24 * 7
+
+# Через сколько дней после публикации статья уходит в архив
+ARCHIVE_AFTER_DAYS = 365
+
+# Сколько секунд запрос новых комментариев ждет ответа (только в
+# многопоточном сервере) и сколько секунд курсор комментариев хранится
+# в кеше
+COMMENTS_POLL_TIMEOUT = 25
+COMMENTS_CURSOR_TIMEOUT = 10
+
+# Как часто записывать накопленные просмотры в базу, секунд
+VIEW_COUNTER_FLUSH_INTERVAL = 5
+# Популярные статьи: за сколько дней и как быстро затухает рейтинг
+POPULAR_WINDOW_DAYS = 30
+POPULAR_GRAVITY = 1.8
+
 
 # Application definition
 
@@ -46,7 +79,9 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
-    'django.contrib.admin',
+    # Без автопоиска admin.py при старте: модули админки загружаются
+    # в kltop/urls.py, только когда процессу нужны URL.
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -62,16 +97,105 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.memory.MemoryMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'kltop.urls'
+
+# Сэмплирующий профилировщик: доля профилируемых запросов, интервал
+# снятия стека в секундах и сколько последних профилей хранить
+PROFILING_SAMPLE_RATE = 0
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MAX_FILES = 200
+
+# Диагностика памяти: tracemalloc замедляет запросы, включайте его на
+# время поиска утечки. Воркер с RSS выше лимита перезапускается, 0 - без
+# лимита
+MEMORY_TRACING = False
+MEMORY_TRACE_FRAMES = 10
+MEMORY_SNAPSHOT_TOP = 30
+MEMORY_RSS_LIMIT_MB = 512
+
+# Запросы к базе дольше порога, мс, пишутся в SLOW_QUERY_LOG_FILE с
+# местом в коде и шаблоне. None отключает журнал
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_FILE = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timestamped': {
+            'format': '{asctime} {process} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        # В файл пишут все воркеры serve, поэтому ротацию делает
+        # logrotate, а обработчик лишь переоткрывает файл после неё.
+        'slow_queries': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'delay': True,
+            'formatter': 'timestamped',
+        },
+    },
+    'loggers': {
+        'core.sqllog': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Ограничение частоты запросов на запись: имя URL -> методы и лимиты
+# на пользователя и на IP. Лимит на IP выше, так как сотрудники офиса
+# обычно выходят в сеть с одного адреса.
+RATELIMIT_ENABLED = True
+RATELIMIT_TRUST_X_FORWARDED_FOR = False
+RATELIMITS = {
+    'posts:post_create': {
+        'methods': ('POST',), 'user': '10/m', 'ip': '100/m'},
+    'posts:add_comment': {
+        'methods': ('POST',), 'user': '20/m', 'ip': '200/m'},
+    'posts:profile_follow': {
+        'methods': ('GET', 'POST'), 'user': '30/m', 'ip': '300/m'},
+    'posts:profile_unfollow': {
+        'methods': ('GET', 'POST'), 'user': '30/m', 'ip': '300/m'},
+    'users:signup': {
+        'methods': ('POST',), 'ip': '20/h'},
+}
+
+# Сессия и пользователь читаются из кеша, в базу сессия пишется
+# только при изменении.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# ModelBackend остается для сессий, открытых до CachedModelBackend:
+# в них записан его путь, без него пользователей выкинет из аккаунта.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Сколько секунд пользователь хранится в кеше
+USER_CACHE_TIMEOUT = 60 * 5
+# Сколько секунд хранятся в кеше группы и отсутствие объекта (для 404)
+INSTANCE_CACHE_TIMEOUT = 60 * 5
+NEGATIVE_CACHE_TIMEOUT = 30
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'knowledge@localhost'
+# Адрес сайта для ссылок в письмах
+SITE_URL = 'http://127.0.0.1:8000'
+# Сколько статей показывать в одном дайджесте
+DIGEST_MAX_POSTS = 20
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'template')
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
@@ -94,6 +218,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'kltop.wsgi.application'
 
+# Адреса, которые `manage.py serve` запрашивает до форка воркеров
+SERVE_WARMUP_URLS = ['/', '/about/author/', '/about/tech/']
+
+# Предел времени холодного старта django.setup(), секунд; проверяется
+# командой `manage.py startup_profile --check`
+STARTUP_TIME_BUDGET = 1.5
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -149,14 +280,47 @@ SUMMERNOTE_THEME = 'bs4'
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# В продакшене статика собирается collectstatic с хешами в именах файлов,
+# поэтому её можно кешировать в браузере навсегда.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+    )
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
+# Время кеширования загруженных файлов в браузере, секунд
+MEDIA_MAX_AGE = 60 * 60 * 24
+# Вставленные в текст статьи картинки уменьшаются до этой ширины
+INLINE_IMAGE_MAX_WIDTH = 1600
+# Качество JPEG для вставленных картинок
+INLINE_IMAGE_QUALITY = 85
+# Ширины версий обложки для srcset
+RESPONSIVE_IMAGE_WIDTHS = [320, 640, 960, 1280, 1920]
+# Форматы, которые браузер может выбрать вместо JPEG через <picture>
+RESPONSIVE_IMAGE_FORMATS = ['WEBP']
+# Сколько секунд generate_thumbnails не трогает обложку после ошибки
+THUMBNAIL_FAILURE_TIMEOUT = 7 * 24 * 60 * 60
+# Размер размытой заглушки обложки, пикселей по большей стороне
+IMAGE_PLACEHOLDER_SIZE = 16
+# gc_media не удаляет файлы моложе этого числа часов
+MEDIA_GC_GRACE_HOURS = 24
+
+# Кеш общий для всех процессов сервера: через него воркеры видят сессии,
+# пользователей, версии лент и лимиты запросов друг друга. Каталог на
+# диске годится для одного сервера, для нескольких нужен memcached
+# Тесты берут кеш во временном каталоге, см. core.runner
+TEST_RUNNER = 'core.runner.TestRunner'
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
@@ -14,10 +14,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 
+from core import assets
+
+
+admin.autodiscover()
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
@@ -29,10 +32,13 @@ urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('summernote/', include('django_summernote.urls')),
-    path('about/', include('about.urls', namespace='about'))
+    path('about/', include('about.urls', namespace='about')),
+    path('diagnostics/', include('core.urls', namespace='core')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+urlpatterns += [
+    re_path(r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')),
+            assets.serve_static),
+    re_path(r'^{}(?P<path>.+)$'.format(settings.MEDIA_URL.lstrip('/')),
+            assets.serve_media),
+]
@@ -1,6 +1,52 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
+from django.shortcuts import render
+from django.urls import path, reverse
+from django.utils.html import format_html
 
 from .models import Comment, Follow, Group, Post
+from .purge import job_status, start_purge
+
+
+class PurgeActionMixin:
+    """Действие быстрого фонового удаления и страница его хода."""
+    actions = ['purge_selected']
+
+    def purge_selected(self, request, queryset):
+        try:
+            job_id = start_purge(self.model,
+                                 queryset.values_list('pk', flat=True))
+        except ImproperlyConfigured as error:
+            self.message_user(request, str(error), messages.ERROR)
+            return
+        opts = self.model._meta
+        name = 'admin:{}_{}_purge'.format(opts.app_label, opts.model_name)
+        url = reverse(name, args=[job_id])
+        self.message_user(
+            request,
+            format_html('Удаление запущено в отдельном процессе. '
+                        '<a href="{}">Ход удаления</a>', url),
+            messages.SUCCESS)
+    purge_selected.short_description = 'Быстро удалить выбранные в фоне'
+    purge_selected.allowed_permissions = ('delete',)
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path('purge/<int:job_id>/',
+                 self.admin_site.admin_view(self.purge_status),
+                 name='{}_{}_purge'.format(opts.app_label, opts.model_name)),
+        ] + super().get_urls()
+
+    def purge_status(self, request, job_id):
+        status = job_status(job_id)
+        if status is None:
+            raise Http404('Задача удаления не найдена')
+        context = dict(self.admin_site.each_context(request),
+                       title='Удаление: {}'.format(status['model']),
+                       status=status, opts=self.model._meta)
+        return render(request, 'admin/purge_status.html', context)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -11,7 +57,7 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(PurgeActionMixin, admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description',)
     search_fields = ('title',)
     empty_value_display = '-пусто-'
@@ -0,0 +1,110 @@
+"""Архив старых статей.
+
+Статьи старше ARCHIVE_AFTER_DAYS вместе с комментариями переносятся
+пачками в таблицы ArchivedPost и ArchivedComment с теми же первичными
+ключами. Ленты читают только Post, а страница статьи и профиль автора
+дочитывают архив, когда статьи нет среди живых.
+"""
+from django.db import router, transaction
+from django.utils.functional import cached_property
+
+from .caching import SITE, author_scope, bump_scopes, group_scope
+from .counters import flush
+from .models import ArchivedComment, ArchivedPost, Comment, Post, RelatedPost
+from .pagination import cached_count
+
+POST_FIELDS = ('id', 'title', 'text', 'pub_date', 'author_id', 'group_id',
+               'image', 'image_width', 'image_height', 'image_placeholder',
+               'views')
+COMMENT_FIELDS = ('id', 'text', 'post_id', 'author_id', 'created')
+
+
+def raw_delete(queryset):
+    # Без сигналов и сбора связанных объектов: связи удаляются заранее.
+    queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def archive_batch(post_ids):
+    """Переносит статьи с комментариями в архив, возвращает их число."""
+    with transaction.atomic():
+        posts = list(Post.objects.filter(pk__in=post_ids).values(
+            *POST_FIELDS, 'author__username', 'group__slug'))
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**{field: post[field] for field in POST_FIELDS})
+            for post in posts)
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**comment)
+            for comment in Comment.objects.filter(
+                post_id__in=post_ids).values(*COMMENT_FIELDS).iterator())
+        raw_delete(Comment.objects.filter(post_id__in=post_ids))
+        raw_delete(RelatedPost.objects.filter(post_id__in=post_ids))
+        raw_delete(RelatedPost.objects.filter(related_id__in=post_ids))
+        raw_delete(Post.objects.filter(pk__in=post_ids))
+    scopes = {SITE}
+    for post in posts:
+        scopes.add(author_scope(post['author__username']))
+        if post['group__slug']:
+            scopes.add(group_scope(post['group__slug']))
+    bump_scopes(scopes)
+    return len(posts)
+
+
+def archive_posts(before, batch_size=500, progress=None):
+    """Архивирует статьи, опубликованные раньше before."""
+    # Накопленные просмотры должны попасть в Post до переноса.
+    flush()
+    archived = 0
+    while True:
+        post_ids = list(
+            Post.objects.filter(pub_date__lt=before)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not post_ids:
+            break
+        archived += archive_batch(post_ids)
+        if progress:
+            progress(archived)
+    return archived
+
+
+class ArchiveChain:
+    """Живые статьи, за ними архивные: object_list для Paginator."""
+    ordered = True
+
+    def __init__(self, live, archived, scope=None):
+        self.live = live
+        self.archived = archived
+        self.scope = scope
+
+    def _count(self, queryset, kind):
+        if self.scope is None:
+            return queryset.count()
+        return cached_count(self.scope, queryset, kind)
+
+    @cached_property
+    def live_count(self):
+        return self._count(self.live, 'posts')
+
+    @cached_property
+    def archived_count(self):
+        return self._count(self.archived, 'archived_posts')
+
+    def count(self):
+        return self.live_count + self.archived_count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            items = self[index:index + 1]
+            if not items:
+                raise IndexError(index)
+            return items[0]
+        items = []
+        if index.start < self.live_count:
+            items.extend(self.live[index.start:index.stop])
+        if index.stop > self.live_count:
+            items.extend(self.archived[
+                max(index.start - self.live_count, 0):
+                index.stop - self.live_count])
+        return items
@@ -0,0 +1,53 @@
+"""Версии кешей по областям: вся лента, группа, автор.
+
+Ключи кеша включают версию области. Запись статьи меняет версии
+затронутых областей, и старые записи кеша просто перестают читаться.
+Версии хранятся в общем кеше, поэтому запись в одном воркере или в
+команде manage.py сразу видна всем воркерам. Ключ версии живет
+SCOPE_VERSION_TIMEOUT секунд, и ключи удаленных групп и авторов не
+копятся.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+SITE = 'site'
+
+
+def group_scope(slug):
+    return 'group:{}'.format(slug)
+
+
+def author_scope(username):
+    return 'author:{}'.format(username)
+
+
+def version_key(scope):
+    return 'scope_version:{}'.format(scope)
+
+
+def new_version():
+    # Версия от времени не повторяется, даже если ключ вытеснен из кеша.
+    return time.time_ns()
+
+
+def scope_version(scope):
+    key = version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # add(), а не set(): воркеры, одновременно не нашедшие версию,
+        # должны прочитать одну и ту же.
+        candidate = new_version()
+        cache.add(key, candidate, settings.SCOPE_VERSION_TIMEOUT)
+        version = cache.get(key)
+        if version is None:
+            # Ключ вытеснен или истек сразу после add().
+            version = candidate
+    return version
+
+
+def bump_scopes(scopes):
+    version = new_version()
+    cache.set_many({version_key(scope): version for scope in scopes},
+                   settings.SCOPE_VERSION_TIMEOUT)
@@ -0,0 +1,112 @@
+"""Счетчик просмотров и рейтинг популярных статей.
+
+Просмотры копятся в памяти процесса и раз в VIEW_COUNTER_FLUSH_INTERVAL
+секунд записываются в базу пачкой UPDATE, по одному на каждое значение
+прироста. Так читатели не встают в очередь к единственному писателю
+SQLite на каждом открытии статьи. Если запись не удалась, например база
+заблокирована, просмотры возвращаются в буфер до следующего сброса.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+
+
+def record_view(post_id):
+    """Учитывает просмотр статьи, при необходимости сбрасывает буфер."""
+    with _lock:
+        _pending[post_id] += 1
+        due = (time.monotonic() - _last_flush
+               >= settings.VIEW_COUNTER_FLUSH_INTERVAL)
+    if due:
+        flush()
+
+
+def take_pending():
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    return pending
+
+
+def flush():
+    """Записывает накопленные просмотры, возвращает число статей.
+
+    Ошибку базы не пробрасывает: сброс идет внутри запроса читателя.
+    """
+    pending = take_pending()
+    if not pending:
+        return 0
+    try:
+        save(pending)
+    except DatabaseError:
+        with _lock:
+            _pending.update(pending)
+        logger.warning('View counts of %d posts kept in buffer',
+                       len(pending), exc_info=True)
+        return 0
+    return len(pending)
+
+
+def save(pending):
+    by_increment = defaultdict(list)
+    for post_id, increment in pending.items():
+        by_increment[increment].append(post_id)
+    with transaction.atomic():
+        for increment, post_ids in by_increment.items():
+            for start in range(0, len(post_ids), BATCH_SIZE):
+                Post.objects.filter(
+                    pk__in=post_ids[start:start + BATCH_SIZE]
+                ).update(views=F('views') + increment)
+
+
+@atexit.register
+def flush_at_exit():
+    pending = take_pending()
+    try:
+        if pending:
+            save(pending)
+    except DatabaseError:
+        # База может быть уже недоступна, например после тестов.
+        pass
+
+
+def decayed_score(views, pub_date, now):
+    """Рейтинг с затуханием по возрасту статьи, как у Hacker News."""
+    age_hours = max((now - pub_date).total_seconds(), 0) / 3600
+    return views / (age_hours + 2) ** settings.POPULAR_GRAVITY
+
+
+def refresh_popularity():
+    """Пересчитывает рейтинг статей за последние POPULAR_WINDOW_DAYS."""
+    now = timezone.now()
+    since = now - timedelta(days=settings.POPULAR_WINDOW_DAYS)
+    Post.objects.filter(pub_date__lt=since, popularity__gt=0).update(
+        popularity=0)
+    recent = Post.objects.filter(pub_date__gte=since).values_list(
+        'id', 'views', 'pub_date')
+    updated = []
+    for post_id, views, pub_date in recent.iterator():
+        updated.append(Post(id=post_id,
+                            popularity=decayed_score(views, pub_date, now)))
+    Post.objects.bulk_update(updated, ['popularity'], batch_size=BATCH_SIZE)
+    return len(updated)
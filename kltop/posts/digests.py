@@ -0,0 +1,119 @@
+"""Дайджесты новых статей избранных авторов.
+
+Пользователи обрабатываются пачками по первичному ключу: на пачку
+приходится по одному запросу к Follow, Post и DigestDelivery. После
+отправки каждой порции писем у получателей обновляется last_sent, так
+что прерванный запуск можно просто повторить: уже получившим письмо
+достанутся только статьи, вышедшие после отправки.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import DigestDelivery, Follow, Post
+
+User = get_user_model()
+
+
+def recipients(after_pk, batch_size):
+    """Следующая пачка активных пользователей с email и подписками."""
+    return list(
+        User.objects.filter(pk__gt=after_pk, is_active=True,
+                            follower__isnull=False)
+        .exclude(email='')
+        .distinct()
+        .order_by('pk')
+        .only('pk', 'email', 'username', 'first_name', 'last_name')
+        [:batch_size]
+    )
+
+
+def new_posts_by_user(users, window_start):
+    """Новые статьи избранных авторов для каждого пользователя пачки."""
+    user_ids = [user.pk for user in users]
+    since = {user_id: window_start for user_id in user_ids}
+    deliveries = DigestDelivery.objects.filter(user_id__in=user_ids)
+    for user_id, last_sent in deliveries.values_list('user_id', 'last_sent'):
+        since[user_id] = max(last_sent, window_start)
+
+    followed = defaultdict(set)
+    follows = Follow.objects.filter(user_id__in=user_ids).values_list(
+        'user_id', 'author_id')
+    for user_id, author_id in follows:
+        followed[user_id].add(author_id)
+    author_ids = set().union(*followed.values())
+
+    posts_by_author = defaultdict(list)
+    posts = Post.objects.filter(
+        author_id__in=author_ids, pub_date__gt=min(since.values())
+    ).select_related('author').only(
+        'id', 'title', 'pub_date', 'author__username',
+        'author__first_name', 'author__last_name',
+    ).order_by('-pub_date')
+    for post in posts.iterator():
+        posts_by_author[post.author_id].append(post)
+
+    result = {}
+    for user_id in user_ids:
+        user_posts = sorted(
+            (post for author_id in followed[user_id]
+             for post in posts_by_author[author_id]
+             if post.pub_date > since[user_id]),
+            key=lambda post: post.pub_date, reverse=True,
+        )
+        if user_posts:
+            result[user_id] = user_posts[:settings.DIGEST_MAX_POSTS]
+    return result
+
+
+def mark_sent(user_ids, sent_at):
+    existing = set(DigestDelivery.objects.filter(
+        user_id__in=user_ids).values_list('user_id', flat=True))
+    DigestDelivery.objects.filter(user_id__in=existing).update(
+        last_sent=sent_at)
+    DigestDelivery.objects.bulk_create(
+        DigestDelivery(user_id=user_id, last_sent=sent_at)
+        for user_id in user_ids if user_id not in existing)
+
+
+def send_digests(period, batch_size=500, chunk_size=100, progress=None):
+    """Рассылает дайджесты за период (timedelta), возвращает число писем."""
+    window_start = timezone.now() - period
+    template = get_template('posts/email/digest.txt')
+    connection = get_connection()
+    sent = 0
+    after_pk = 0
+    while True:
+        users = recipients(after_pk, batch_size)
+        if not users:
+            break
+        after_pk = users[-1].pk
+        new_posts = new_posts_by_user(users, window_start)
+        messages = []
+        for user in users:
+            if user.pk not in new_posts:
+                continue
+            body = template.render({
+                'user': user,
+                'posts': new_posts[user.pk],
+                'site_url': settings.SITE_URL,
+            })
+            message = EmailMessage(
+                'Новые статьи избранных авторов', body,
+                settings.DEFAULT_FROM_EMAIL, [user.email],
+                connection=connection)
+            message.user_id = user.pk
+            messages.append(message)
+        for start in range(0, len(messages), chunk_size):
+            chunk = messages[start:start + chunk_size]
+            sent_at = timezone.now()
+            connection.send_messages(chunk)
+            mark_sent([message.user_id for message in chunk], sent_at)
+            sent += len(chunk)
+        if progress:
+            progress(after_pk, sent)
+    return sent
@@ -0,0 +1,142 @@
+"""RSS и Atom ленты сайта, групп и авторов.
+
+Готовое тело ленты хранится в кеше под версией области (см.
+posts.caching) до следующей записи статьи в этой области. ETag равен
+версии, поэтому повторный опрос стоит одного чтения из кеша или 304.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from core.assets import etag_matches
+
+from .caching import SITE, author_scope, group_scope, scope_version
+from .models import Group, Post
+
+User = get_user_model()
+
+FEED_ITEMS = 20
+DESCRIPTION_WORDS = 50
+
+
+class LatestPostsFeed(Feed):
+    title = 'База Знаний ТОП: последние статьи'
+    description = 'Новые статьи базы знаний компании.'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.select_related('author', 'group')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return Truncator(strip_tags(item.text)).words(DESCRIPTION_WORDS)
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+    def cache_scope(self):
+        return SITE
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return 'База Знаний ТОП: {}'.format(group.title)
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def items(self, group):
+        return group.posts.select_related('author', 'group')[:FEED_ITEMS]
+
+    def cache_scope(self, slug):
+        return group_scope(slug)
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return 'База Знаний ТОП: статьи {}'.format(
+            author.get_full_name() or author.username)
+
+    def description(self, author):
+        return self.title(author)
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def items(self, author):
+        return author.posts.select_related('author', 'group')[:FEED_ITEMS]
+
+    def cache_scope(self, username):
+        return author_scope(username)
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.title(author)
+
+
+def cached_feed(feed_class):
+    """View ленты с кешем тела по версии области и условным GET."""
+    feed = feed_class()
+
+    def view(request, **kwargs):
+        version = scope_version(feed.cache_scope(**kwargs))
+        etag = '"{:x}"'.format(version)
+        if etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+            response = HttpResponseNotModified()
+        else:
+            key = 'feed:{}:{}'.format(request.path, version)
+            cached = cache.get(key)
+            if cached is None:
+                rendered = feed(request, **kwargs)
+                cached = (rendered.content, rendered['Content-Type'])
+                cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+            response = HttpResponse(cached[0], content_type=cached[1])
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        return response
+
+    return view
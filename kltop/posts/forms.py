@@ -1,16 +1,23 @@
 from django import forms
-from django_summernote.widgets import SummernoteWidget
 
 from .models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
-    text = forms.CharField(widget=SummernoteWidget())
+    text = forms.CharField()
 
     class Meta:
         model = Post
         fields = ('title', 'text', 'group', 'image',)
 
+    def __init__(self, *args, **kwargs):
+        # Summernote тянет за собой Pillow, импортируем его только
+        # когда форма действительно нужна.
+        from django_summernote.widgets import SummernoteWidget
+
+        super().__init__(*args, **kwargs)
+        self.fields['text'].widget = SummernoteWidget()
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
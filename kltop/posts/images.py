@@ -0,0 +1,95 @@
+"""Обложки статей: размеры и размытая заглушка.
+
+Размеры обложки и крошечная размытая копия в data: URI считаются один
+раз при сохранении статьи и хранятся в ней самой. Так карточка сразу
+резервирует место под картинку и показывает заглушку, пока грузится
+настоящая версия, не читая файл обложки при каждом запросе.
+"""
+import base64
+import io
+import logging
+
+from django.conf import settings
+
+from .caching import SITE, author_scope, bump_scopes, group_scope
+from .models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+
+
+def inspect_image(image):
+    """(ширина, высота, заглушка) для файла обложки."""
+    # Pillow нужен только при сохранении статьи с обложкой.
+    from PIL import Image, ImageFilter
+
+    size = settings.IMAGE_PLACEHOLDER_SIZE
+    image.seek(0)
+    try:
+        with Image.open(image) as picture:
+            width, height = picture.size
+            # Для JPEG декодирует сразу уменьшенную копию.
+            picture.draft('RGB', (size * 4, size * 4))
+            picture = picture.convert('RGB')
+            picture.thumbnail((size, size))
+            picture = picture.filter(ImageFilter.GaussianBlur(1))
+            output = io.BytesIO()
+            picture.save(output, 'WEBP', quality=30)
+    finally:
+        image.seek(0)
+    return width, height, 'data:image/webp;base64,{}'.format(
+        base64.b64encode(output.getvalue()).decode())
+
+
+def update_image_fields(post):
+    """Заполняет размеры и заглушку обложки статьи."""
+    if not post.image:
+        post.image_width = post.image_height = None
+        post.image_placeholder = ''
+        return
+    committed = post.image._committed
+    try:
+        (post.image_width, post.image_height,
+         post.image_placeholder) = inspect_image(post.image)
+    except Exception as error:
+        # Pillow бросает для испорченных файлов исключения разных типов.
+        logger.warning('Cannot read cover of post %s: %s', post.pk, error)
+    finally:
+        if committed:
+            post.image.close()
+
+
+def backfill(batch_size=100, progress=None):
+    """Заполняет размеры и заглушки уже сохраненных обложек.
+
+    Возвращает число обработанных статей.
+    """
+    done = 0
+    for model in (Post, ArchivedPost):
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(
+                pk__gt=last_pk, image_width__isnull=True,
+            ).exclude(image='').select_related('author', 'group').only(
+                'image', 'author__username', 'group__slug',
+            ).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            scopes = set()
+            for post in batch:
+                update_image_fields(post)
+                if post.image_width is None:
+                    continue
+                # Без save(): похожие статьи пересчитывать незачем.
+                model.objects.filter(pk=post.pk).update(
+                    image_width=post.image_width,
+                    image_height=post.image_height,
+                    image_placeholder=post.image_placeholder)
+                done += 1
+                scopes.update([SITE, author_scope(post.author.username)])
+                if post.group_id:
+                    scopes.add(group_scope(post.group.slug))
+            bump_scopes(scopes)
+            last_pk = batch[-1].pk
+            if progress is not None:
+                progress(done)
+    return done
@@ -0,0 +1,181 @@
+"""Картинки, вставленные в текст статьи как data: URI.
+
+Summernote кладет вставленную из буфера картинку прямо в HTML в base64.
+Такой текст раздувает каждую выборку статьи, а картинку нельзя
+закешировать в браузере. Перед сохранением статьи картинки декодируются,
+уменьшаются до INLINE_IMAGE_MAX_WIDTH, пережимаются и сохраняются в
+posts/inline/<sha1>, а тег <img> получает ссылку на файл, размеры и
+loading="lazy". Одинаковые картинки хранятся одним файлом.
+"""
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .caching import SITE, author_scope, bump_scopes, group_scope
+from .models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+
+MARKER = 'data:image/'
+INLINE_DIR = 'posts/inline/'
+IMG_TAG = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+ATTRIBUTE = re.compile(
+    r'''([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?''')
+DATA_URI = re.compile(
+    r'^data:image/(png|jpe?g|gif|webp|bmp);base64,([a-z0-9+/=\s]+)$',
+    re.IGNORECASE)
+# Эти атрибуты тег получает заново.
+REPLACED = {'src', 'width', 'height', 'loading'}
+
+
+def attributes(tag):
+    """Атрибуты тега <img> по порядку: [(имя, значение или None)]."""
+    inner = tag[len('<img'):-1].rstrip('/')
+    found = []
+    for match in ATTRIBUTE.finditer(inner):
+        name, double, single, bare = match.groups()
+        value = next((part for part in (double, single, bare)
+                      if part is not None), None)
+        found.append((name.lower(), value))
+    return found
+
+
+def optimize(data):
+    """(байты, расширение, ширина, высота) для сохранения картинки."""
+    # Pillow нужен только статьям со вставленными картинками.
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    original_format = image.format
+    if original_format == 'GIF' and getattr(image, 'is_animated', False):
+        # Анимацию не пережимаем, чтобы не потерять кадры.
+        return data, 'gif', image.width, image.height
+    resized = image.width > settings.INLINE_IMAGE_MAX_WIDTH
+    if resized:
+        image.thumbnail((settings.INLINE_IMAGE_MAX_WIDTH, image.height),
+                        Image.LANCZOS)
+    output = io.BytesIO()
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image.save(output, 'PNG', optimize=True)
+        extension = 'png'
+    else:
+        image.convert('RGB').save(
+            output, 'JPEG', quality=settings.INLINE_IMAGE_QUALITY,
+            optimize=True, progressive=True)
+        extension = 'jpg'
+    optimized = output.getvalue()
+    if not resized and len(data) <= len(optimized):
+        extension = 'jpg' if original_format == 'JPEG' else (
+            original_format.lower())
+        optimized = data
+    return optimized, extension, image.width, image.height
+
+
+def store(data):
+    """Сохраняет картинку из data: URI, возвращает (url, ширина, высота)."""
+    content, extension, width, height = optimize(data)
+    name = '{}{}.{}'.format(
+        INLINE_DIR, hashlib.sha1(data).hexdigest(), extension)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    else:
+        touch(name)
+    return default_storage.url(name), width, height
+
+
+def touch(name):
+    # Свежий mtime уберегает файл от сборщика media_gc, пока статья с
+    # новой ссылкой на него еще не сохранена.
+    try:
+        os.utime(default_storage.path(name))
+    except (NotImplementedError, OSError):
+        pass
+
+
+def rewrite(tag):
+    """Тег со ссылкой на файл вместо data: URI или None, если не вышло."""
+    found = attributes(tag)
+    source = dict(found).get('src') or ''
+    match = DATA_URI.match(source.strip())
+    if match is None:
+        return None
+    try:
+        data = base64.b64decode(re.sub(r'\s', '', match.group(2)),
+                                validate=True)
+        url, width, height = store(data)
+    except Exception as error:
+        # Pillow бросает для испорченных файлов исключения разных типов,
+        # а потерять текст статьи из-за картинки хуже, чем оставить её.
+        logger.warning('Inline image left as is: %s', error)
+        return None
+    parts = ['<img src="{}"'.format(url)]
+    for name, value in found:
+        if name in REPLACED:
+            continue
+        if value is None:
+            parts.append(name)
+        else:
+            parts.append('{}="{}"'.format(name, value.replace('"', '&quot;')))
+    parts.append('width="{}" height="{}" loading="lazy">'.format(
+        width, height))
+    return ' '.join(parts)
+
+
+def extract_inline_images(html):
+    """Выносит картинки из HTML в файлы, возвращает (html, их число)."""
+    if not html or MARKER not in html:
+        return html, 0
+    extracted = 0
+
+    def replace(match):
+        nonlocal extracted
+        tag = rewrite(match.group(0))
+        if tag is None:
+            return match.group(0)
+        extracted += 1
+        return tag
+
+    return IMG_TAG.sub(replace, html), extracted
+
+
+def extract_all(batch_size=100, progress=None):
+    """Выносит картинки из уже сохраненных статей и архива.
+
+    Возвращает (число статей, число картинок).
+    """
+    posts = images = 0
+    for model in (Post, ArchivedPost):
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(
+                pk__gt=last_pk, text__contains=MARKER,
+            ).order_by('pk').values_list(
+                'pk', 'text', 'author__username', 'group__slug',
+            )[:batch_size])
+            if not batch:
+                break
+            scopes = set()
+            for pk, text, username, slug in batch:
+                text, count = extract_inline_images(text)
+                if not count:
+                    continue
+                # Без save(): похожие статьи пересчитывать незачем.
+                model.objects.filter(pk=pk).update(text=text)
+                posts += 1
+                images += count
+                scopes.update([SITE, author_scope(username)])
+                if slug:
+                    scopes.add(group_scope(slug))
+            bump_scopes(scopes)
+            last_pk = batch[-1][0]
+            if progress is not None:
+                progress(posts, images)
+    return posts, images
@@ -0,0 +1,25 @@
+"""Кешированные группы и авторы статей, см. core.instances."""
+from core.instances import InstanceCache
+from users.backends import user_cache
+
+from .models import Group
+
+group_cache = InstanceCache(Group, 'slug')
+
+
+def hydrate(objects):
+    """Подставляет авторов и группы статей из кеша двумя get_many.
+
+    Подходит и для комментариев, у которых нет группы. Возвращает
+    список, чтобы queryset не выполнился повторно.
+    """
+    objects = list(objects)
+    authors = user_cache.get_many({obj.author_id for obj in objects})
+    groups = group_cache.get_many(
+        {obj.group_id for obj in objects if getattr(obj, 'group_id', None)})
+    for obj in objects:
+        if obj.author_id in authors:
+            obj.author = authors[obj.author_id]
+        if getattr(obj, 'group_id', None) in groups:
+            obj.group = groups[obj.group_id]
+    return objects
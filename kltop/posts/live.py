@@ -0,0 +1,67 @@
+"""Новые комментарии к статье без перезагрузки страницы.
+
+Курсором служит номер последнего комментария статьи. Он хранится в
+общем кеше COMMENTS_CURSOR_TIMEOUT секунд, так что частые опросы не
+обращаются к базе. Новый комментарий удаляет курсор из кеша, и первый
+же опрос в любом воркере перечитывает его из базы. Если чтение из базы
+разминулось с удалением, устаревший курсор живет не дольше своего
+срока.
+
+Ожидание нового комментария держит поток, поэтому запрос ждет только
+в многопоточном сервере. Ожидающие запросы спят на общем для процесса
+Condition, который будит сигнал сохранения комментария. Комментарий из
+другого процесса будит их через общий кеш: ожидание само просыпается
+раз в WAKE_STEP секунд, чтобы перечитать курсор. Воркеры manage.py
+serve однопоточны, и там клиент просто опрашивает сервер раз в
+несколько секунд.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Comment
+
+WAKE_STEP = 1
+# Больше комментариев за один ответ не отдаем, остальные придут в
+# следующем опросе.
+COMMENTS_PER_POLL = 100
+
+_new_comment = threading.Condition()
+
+
+def cursor_key(post_id):
+    return 'comments_cursor:{}'.format(post_id)
+
+
+def latest_comment_id(post_id):
+    latest = cache.get(cursor_key(post_id))
+    if latest is None:
+        latest = Comment.objects.filter(post_id=post_id).order_by(
+            '-pk').values_list('pk', flat=True).first() or 0
+        cache.add(cursor_key(post_id), latest,
+                  settings.COMMENTS_CURSOR_TIMEOUT)
+    return latest
+
+
+def comment_added(comment):
+    """Сбрасывает курсор статьи и будит ожидающие запросы процесса."""
+    cache.delete(cursor_key(comment.post_id))
+    with _new_comment:
+        _new_comment.notify_all()
+
+
+def wait_for_comments(post_id, after, timeout):
+    """Ждет комментарий новее after не дольше timeout секунд.
+
+    Возвращает номер последнего комментария статьи.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        latest = latest_comment_id(post_id)
+        remaining = deadline - time.monotonic()
+        if latest > after or remaining <= 0:
+            return latest
+        with _new_comment:
+            _new_comment.wait(min(remaining, WAKE_STEP))
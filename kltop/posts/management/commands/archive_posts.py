@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = ('Переносит старые статьи с комментариями в архив. '
+            'Запускайте по расписанию, например раз в сутки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать статьи старше этого числа дней.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько статей переносить за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        before = timezone.now() - timedelta(days=options['days'])
+        count = archive_posts(before, batch_size=options['batch_size'],
+                              progress=self.progress)
+        self.stdout.write('Archived {} posts'.format(count))
+
+    def progress(self, archived):
+        if self.verbosity > 1:
+            self.stdout.write('{} posts archived'.format(archived))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import backfill
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры и размытые заглушки обложек у статей, '
+            'сохраненных до их появления.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько статей читать за один запрос.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        done = backfill(batch_size=options['batch_size'],
+                        progress=self.progress)
+        self.stdout.write('Updated {} covers'.format(done))
+
+    def progress(self, done):
+        if self.verbosity > 1:
+            self.stdout.write('{} covers updated'.format(done))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.inline_images import extract_all
+
+
+class Command(BaseCommand):
+    help = ('Выносит вставленные в текст статей картинки base64 в файлы. '
+            'Новые статьи обрабатываются при сохранении, команда нужна '
+            'для уже сохраненных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько статей читать за один запрос.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        posts, images = extract_all(batch_size=options['batch_size'],
+                                    progress=self.progress)
+        self.stdout.write(
+            'Extracted {} images from {} posts'.format(images, posts))
+
+    def progress(self, posts, images):
+        if self.verbosity > 1:
+            self.stdout.write('{} posts, {} images'.format(posts, images))
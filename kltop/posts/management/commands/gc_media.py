@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import PREFIX, collect
+
+
+class Command(BaseCommand):
+    help = ('Удаляет файлы статей в MEDIA_ROOT, на которые больше не '
+            'ссылается ни одна статья, вместе с их миниатюрами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float,
+            default=settings.MEDIA_GC_GRACE_HOURS,
+            help='Не трогать файлы моложе этого числа часов.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько файлов проверять одним запросом.')
+        parser.add_argument(
+            '--prefix', default=PREFIX,
+            help='Каталог внутри MEDIA_ROOT, который нужно обойти.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что было бы удалено.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        self.dry_run = options['dry_run']
+        stats = collect(grace=timedelta(hours=options['grace_hours']),
+                        batch_size=options['batch_size'],
+                        dry_run=self.dry_run, prefix=options['prefix'],
+                        progress=self.progress)
+        self.stdout.write(
+            '{} {} orphaned files ({:.1f} MB) of {} scanned ({:.1f} MB, '
+            '{} too young) in {:.1f}s, {:.0f} files/s'.format(
+                'Found' if self.dry_run else 'Deleted', stats.orphans,
+                stats.orphan_bytes / 2 ** 20, stats.scanned,
+                stats.scanned_bytes / 2 ** 20, stats.young, stats.elapsed,
+                stats.rate()))
+
+    def progress(self, stats, orphans):
+        if self.verbosity > 1:
+            for name in orphans:
+                self.stdout.write(('would delete ' if self.dry_run
+                                   else 'deleted ') + name)
+            self.stdout.write('{} files scanned, {:.0f} files/s'.format(
+                stats.scanned, stats.rate()))
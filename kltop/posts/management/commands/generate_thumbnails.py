@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import generate_missing
+
+
+class Command(BaseCommand):
+    help = ('Создает недостающие версии обложек статей и архива. '
+            'Запускается по расписанию, страницы версии не создают.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько статей читать за один запрос.')
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help='Снова обработать обложки, на которых была ошибка.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        created, failed = generate_missing(
+            batch_size=options['batch_size'],
+            retry_failed=options['retry_failed'],
+            progress=self.progress)
+        self.stdout.write('Created {} versions, {} failed'.format(
+            created, failed))
+
+    def progress(self, created, failed):
+        if self.verbosity > 1:
+            self.stdout.write('{} versions created, {} failed'.format(
+                created, failed))
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Group, PurgeJob
+from posts.purge import CHUNK_SIZE, purge_groups, purge_users, run_job
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Быстро удаляет пользователей или группы со всеми '
+            'зависимыми строками, файлами и кешами. Выполняет и задачи '
+            'удаления, запущенные из админки.')
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--user', nargs='+', metavar='USERNAME',
+                            default=[])
+        target.add_argument('--group', nargs='+', metavar='SLUG',
+                            default=[])
+        target.add_argument('--job', type=int, help='Номер задачи из админки.')
+        target.add_argument(
+            '--pending', action='store_true',
+            help='Выполнить незавершенные задачи из админки, например '
+                 'прерванные перезапуском сервера.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Сколько строк удалять за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['job'] or options['pending']:
+            return self.run_jobs(options['job'])
+        if options['user']:
+            pks = self.lookup(User, 'username', options['user'])
+            counts = purge_users(pks, options['chunk_size'], self.progress)
+        else:
+            pks = self.lookup(Group, 'slug', options['group'])
+            counts = purge_groups(pks, options['chunk_size'], self.progress)
+        for label, count in sorted(counts.items()):
+            self.stdout.write('{}: {} rows deleted'.format(label, count))
+
+    def run_jobs(self, job_id):
+        jobs = PurgeJob.objects.filter(finished__isnull=True)
+        if job_id:
+            jobs = PurgeJob.objects.filter(pk=job_id)
+            if not jobs:
+                raise CommandError('Purge job {} not found'.format(job_id))
+        for job in jobs.order_by('pk'):
+            error = run_job(job, self.progress)
+            self.stdout.write('Job {}: {}'.format(job.pk, error or 'done'))
+
+    def lookup(self, model, field, values):
+        found = dict(model.objects.filter(
+            **{'{}__in'.format(field): values}).values_list(field, 'pk'))
+        missing = sorted(set(values) - set(found))
+        if missing:
+            raise CommandError('Not found: {}'.format(', '.join(missing)))
+        return list(found.values())
+
+    def progress(self, counts):
+        if self.verbosity > 1:
+            self.stdout.write(', '.join(
+                '{}={}'.format(label, count)
+                for label, count in sorted(counts.items())))
@@ -0,0 +1,21 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.similarity import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересчитывает похожие статьи и индекс TF-IDF.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.RELATED_POSTS_TOP_K,
+            help='Сколько похожих статей сохранять для каждой статьи.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild(options['top_k'])
+        self.stdout.write('Saved {} related posts in {:.2f}s'.format(
+            count, time.monotonic() - started))
@@ -0,0 +1,21 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import refresh_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для подписки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.FOLLOW_SUGGESTIONS_TOP_K,
+            help='Сколько авторов сохранять для каждого пользователя.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = refresh_suggestions(options['top_k'])
+        self.stdout.write('Saved {} suggestions in {:.2f}s'.format(
+            count, time.monotonic() - started))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import flush, refresh_popularity
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг популярных статей. '
+            'Запускайте по расписанию, например раз в 10 минут.')
+
+    def handle(self, *args, **options):
+        flush()
+        count = refresh_popularity()
+        self.stdout.write('Popularity updated for {} posts'.format(count))
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from posts.digests import send_digests
+
+PERIODS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+}
+
+
+class Command(BaseCommand):
+    help = ('Рассылает дайджесты новых статей избранных авторов. '
+            'Прерванную рассылку можно запустить повторно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', choices=PERIODS, default='daily')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько пользователей обрабатывать за один проход.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=100,
+            help='Сколько писем отправлять за одно соединение.')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        sent = send_digests(
+            PERIODS[options['period']],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            progress=self.progress,
+        )
+        self.stdout.write('Sent {} digests'.format(sent))
+
+    def progress(self, last_user_pk, sent):
+        if self.verbosity > 1:
+            self.stdout.write('Users up to pk={}: {} sent'.format(
+                last_user_pk, sent))
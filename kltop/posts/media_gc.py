@@ -0,0 +1,120 @@
+"""Удаление файлов статей, на которые больше ничего не ссылается.
+
+Обложка удаленной или отредактированной статьи остается на диске вместе
+с миниатюрами sorl. Сборщик обходит каталог posts/ в MEDIA_ROOT через
+os.scandir, не собирая список файлов в память, и проверяет файлы пачками:
+на пачку приходится по одному запросу image IN (...) к статьям и к
+архиву. Ссылки на вставленные в текст картинки (см. inline_images)
+собираются заранее одним проходом по текстам, где они есть.
+
+Файлы моложе grace не трогаются: файл сохраняется раньше, чем
+фиксируется транзакция со статьей, которая на него ссылается.
+"""
+import os
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+
+from .inline_images import INLINE_DIR
+from .models import ArchivedPost, Post
+from .thumbnails import delete_images
+
+PREFIX = 'posts/'
+INLINE_NAME = re.compile(re.escape(INLINE_DIR) + r'[0-9a-f]{40}\.\w+')
+
+
+def walk(root, prefix):
+    """(имя в хранилище, размер, mtime) файлов каталога, в глубину."""
+    stack = [prefix.rstrip('/')]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, directory))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = '{}/{}'.format(directory, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, stat.st_size, stat.st_mtime
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def inline_references():
+    """Имена вставленных картинок, на которые ссылаются тексты статей."""
+    names = set()
+    for model in (Post, ArchivedPost):
+        texts = model.objects.filter(text__contains=INLINE_DIR).values_list(
+            'text', flat=True)
+        for text in texts.iterator():
+            names.update(INLINE_NAME.findall(text))
+    return names
+
+
+def cover_references(names):
+    """Те из names, что служат обложками статей или архива."""
+    found = set()
+    for model in (Post, ArchivedPost):
+        found.update(model.objects.filter(image__in=names).values_list(
+            'image', flat=True))
+    return found
+
+
+class Stats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.scanned = self.scanned_bytes = 0
+        self.young = 0
+        self.orphans = self.orphan_bytes = 0
+        self.batches = 0
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def rate(self):
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+def collect(grace=timedelta(hours=24), batch_size=500, dry_run=False,
+            prefix=PREFIX, progress=None):
+    """Удаляет осиротевшие файлы старше grace вместе с миниатюрами.
+
+    В режиме dry_run только считает их. progress(stats, orphans)
+    вызывается после каждой пачки со списком найденных в ней имен.
+    """
+    stats = Stats()
+    inline = inline_references()
+    cutoff = time.time() - grace.total_seconds()
+    files = walk(settings.MEDIA_ROOT, prefix)
+    for batch in batches(files, batch_size):
+        stats.batches += 1
+        stats.scanned += len(batch)
+        stats.scanned_bytes += sum(size for _, size, _ in batch)
+        old = {name: size for name, size, mtime in batch if mtime < cutoff}
+        stats.young += len(batch) - len(old)
+        candidates = [name for name in old if name not in inline]
+        referenced = cover_references(candidates) if candidates else set()
+        orphans = [name for name in candidates if name not in referenced]
+        stats.orphans += len(orphans)
+        stats.orphan_bytes += sum(old[name] for name in orphans)
+        if orphans and not dry_run:
+            delete_images(orphans)
+        if progress is not None:
+            progress(stats, orphans)
+    return stats
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0023_auto_20261019_1536'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestDelivery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_sent', models.DateTimeField(verbose_name='Дата отправки')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='digest_delivery', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-19 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0024_digestdelivery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100, verbose_name='Название статьи')),
+                ('text', models.CharField(max_length=50000, verbose_name='Текст статьи')),
+                ('pub_date', models.DateTimeField(db_index=True, verbose_name='Date of pub')),
+                ('image', models.ImageField(blank=True, upload_to='posts/', verbose_name='Обложка статьи')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Просмотры')),
+                ('archived', models.DateTimeField(auto_now_add=True, verbose_name='Дата переноса в архив')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='Author')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='posts.Group')),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.CharField(max_length=100, verbose_name='Комментарий')),
+                ('created', models.DateTimeField(verbose_name='Date of create comment')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.ArchivedPost')),
+            ],
+        ),
+    ]
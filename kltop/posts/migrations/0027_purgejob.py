@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_auto_20261019_1602'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Модель')),
+                ('object_ids', models.TextField(verbose_name='Ключи удаляемых записей через запятую')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='Строк в пачке')),
+                ('counts', models.TextField(default='{}', verbose_name='Удалено строк по таблицам, JSON')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата запуска')),
+                ('finished', models.DateTimeField(null=True, verbose_name='Дата завершения')),
+            ],
+        ),
+    ]
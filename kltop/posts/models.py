@@ -42,6 +42,22 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    # Размеры и заглушка обложки заполняются при сохранении статьи.
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_placeholder = models.CharField(
+        'Размытая заглушка обложки',
+        max_length=1000,
+        blank=True,
+        editable=False
+    )
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    popularity = models.FloatField(
+        'Популярность',
+        default=0,
+        db_index=True,
+        help_text='Пересчитывается командой refresh_popularity'
+    )
 
     class Meta:
         ordering = ['-pub_date']
@@ -90,3 +106,131 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендованный для подписки автор.
+
+    Таблица целиком пересчитывается командой refresh_follow_suggestions.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow_suggestion'
+            )
+        ]
+
+
+class RelatedPost(models.Model):
+    """Похожая статья по TF-IDF, см. posts.similarity."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_links'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'related'],
+                name='unique_related_post'
+            )
+        ]
+
+
+class DigestDelivery(models.Model):
+    """Когда пользователю последний раз ушел дайджест новых статей."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='digest_delivery'
+    )
+    last_sent = models.DateTimeField('Дата отправки')
+
+
+class ArchivedPost(models.Model):
+    """Старая статья, перенесенная из Post командой archive_posts.
+
+    Первичный ключ совпадает с ключом исходной статьи, поэтому ссылки
+    на статью продолжают работать.
+    """
+    title = models.CharField('Название статьи', max_length=100)
+    text = models.CharField('Текст статьи', max_length=50000)
+    pub_date = models.DateTimeField('Date of pub', db_index=True)
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_posts',
+                               verbose_name='Author')
+    group = models.ForeignKey(Group,
+                              on_delete=models.SET_NULL,
+                              blank=True,
+                              null=True,
+                              related_name='archived_posts')
+    image = models.ImageField('Обложка статьи', upload_to='posts/',
+                              blank=True)
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_placeholder = models.CharField('Размытая заглушка обложки',
+                                         max_length=1000, blank=True,
+                                         editable=False)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    archived = models.DateTimeField('Дата переноса в архив',
+                                    auto_now_add=True)
+
+    class Meta:
+        ordering = ['-pub_date']
+
+    def __str__(self) -> str:
+        return self.text[:TEXT_LIMETER]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к статье из архива."""
+    text = models.CharField('Комментарий', max_length=100)
+    post = models.ForeignKey(ArchivedPost,
+                             on_delete=models.CASCADE,
+                             related_name='comments')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_comments')
+    created = models.DateTimeField('Date of create comment')
+
+
+class PurgeJob(models.Model):
+    """Быстрое удаление, запущенное из админки.
+
+    Выполняется командой purge --job в отдельном процессе, поэтому не
+    зависит от перезапуска воркеров, а ход виден из любого воркера.
+    """
+    model = models.CharField('Модель', max_length=100)
+    object_ids = models.TextField('Ключи удаляемых записей через запятую')
+    chunk_size = models.PositiveIntegerField('Строк в пачке')
+    counts = models.TextField('Удалено строк по таблицам, JSON',
+                              default='{}')
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Дата запуска', auto_now_add=True)
+    finished = models.DateTimeField('Дата завершения', null=True)
+
+    def __str__(self) -> str:
+        return 'Purge {} #{}'.format(self.model, self.pk)
@@ -0,0 +1,100 @@
+"""Постраничный вывод лент.
+
+Число записей ленты хранится в кеше под версией её области (см.
+posts.caching), поэтому COUNT(*) выполняется один раз после каждой
+записи статьи в области, а не на каждый запрос. Версии и числа лежат
+в общем кеше: запись в одном воркере сбрасывает число во всех.
+Навигация показывает только окно страниц вокруг текущей и края списка,
+как Paginator.get_elided_page_range в новых версиях Django.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .caching import scope_version
+from .instances import hydrate
+from .thumbnails import prefetch_covers
+
+ELLIPSIS = '…'
+ON_EACH_SIDE = 3
+ON_ENDS = 2
+
+
+def cached_count(scope, queryset, kind='posts'):
+    """Число записей queryset, закешированное до записи в области.
+
+    kind различает разные наборы записей одной области.
+    """
+    key = 'count:{}:{}:{}'.format(scope, kind, scope_version(scope))
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class HydratedPosts:
+    """Статьи страницы, авторы и группы которых берутся из кеша.
+
+    Статьи и версии их обложек читаются при первом обращении, поэтому
+    страница, чей фрагмент шаблона уже в кеше, не делает запросов за
+    статьями.
+    """
+    def __init__(self, posts):
+        self.posts = posts
+
+    @cached_property
+    def items(self):
+        posts = hydrate(self.posts)
+        prefetch_covers(posts)
+        return posts
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берет число записей из кеша области.
+
+    Без scope число записей считается как обычно: для лент, которые
+    меняются без записи статей (подписки, популярное).
+    """
+    def __init__(self, object_list, per_page, scope=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scope = scope
+
+    @cached_property
+    def count(self):
+        if self.scope is None:
+            return super().count
+        return cached_count(self.scope, self.object_list)
+
+    def _get_page(self, object_list, *args, **kwargs):
+        return super()._get_page(HydratedPosts(object_list), *args, **kwargs)
+
+
+def elided_page_range(number, num_pages, on_each_side=ON_EACH_SIDE,
+                      on_ends=ON_ENDS):
+    """Номера страниц для навигации, пропуски обозначены ELLIPSIS."""
+    if num_pages <= (on_each_side + on_ends) * 2:
+        yield from range(1, num_pages + 1)
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
@@ -0,0 +1,278 @@
+"""Быстрое удаление пользователей и групп со всеми зависимыми строками.
+
+Django при удалении загружает в память все связанные объекты. Здесь
+зависимости обходятся по тем же связям, что и у Collector, но строки
+удаляются пачками DELETE ... WHERE id IN (...) по CHUNK_SIZE ключей, и
+каждая пачка — отдельная короткая транзакция. Прерванное удаление
+можно просто запустить снова.
+
+Файлы из FileField удаленных строк и их миниатюры sorl удаляются после
+фиксации пачки, кеши пользователя и лент сбрасываются в конце.
+
+Удаление из админки записывается в PurgeJob и выполняется командой
+purge --job в отдельном процессе: поток внутри воркера погиб бы при его
+перезапуске.
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, router, transaction
+from django.utils import timezone
+
+from users.backends import user_cache
+
+from .caching import SITE, author_scope, bump_scopes, group_scope
+from .instances import group_cache
+from .models import ArchivedPost, Group, Post, PurgeJob
+
+CHUNK_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+def dependents(model):
+    """Обратные связи на модель, как в Collector, включая скрытые."""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete
+        and (field.one_to_one or field.one_to_many)
+    ]
+
+
+def replacement(field):
+    """Значение внешнего ключа для SET_NULL, SET_DEFAULT и SET(...)."""
+    on_delete = field.on_delete
+    if on_delete is models.SET_NULL:
+        return None
+    if on_delete is models.SET_DEFAULT:
+        return field.field.get_default()
+    value = on_delete.deconstruct()[1][0]
+    return value() if callable(value) else value
+
+
+def is_set(on_delete):
+    # models.SET(value) возвращает новую функцию с deconstruct().
+    deconstruct = getattr(on_delete, 'deconstruct', None)
+    return deconstruct is not None and deconstruct()[0] == (
+        'django.db.models.SET')
+
+
+def check_relations(model, seen=None):
+    """Проверяет до удаления, что все связи на model поддерживаются.
+
+    Иначе удаление остановилось бы на полпути.
+    """
+    seen = set() if seen is None else seen
+    if model in seen:
+        return
+    seen.add(model)
+    for field in dependents(model):
+        on_delete = field.on_delete
+        if on_delete is models.CASCADE:
+            check_relations(field.related_model, seen)
+        elif on_delete not in (models.SET_NULL, models.SET_DEFAULT,
+                               models.PROTECT, models.DO_NOTHING) and (
+                not is_set(on_delete)):
+            raise ImproperlyConfigured(
+                'Cannot purge {}: {} uses unsupported on_delete={}'.format(
+                    model._meta.label, field.field,
+                    getattr(on_delete, '__name__', on_delete)))
+
+
+def raw_delete(queryset):
+    queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def delete_files(names):
+    # sorl импортирует Pillow, он нужен только при удалении файлов.
+    from sorl.thumbnail import delete
+
+    for name in names:
+        try:
+            delete(name)
+        except OSError:
+            logger.warning('Could not delete media file %s', name)
+
+
+class Purge:
+    """Удаляет строки queryset и всё, что от них зависит.
+
+    progress(counts) вызывается после каждой пачки со словарем
+    'app_label.model' -> число удаленных строк.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, progress=None):
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.counts = {}
+
+    def run(self, queryset):
+        check_relations(queryset.model)
+        self.delete(queryset)
+        return self.counts
+
+    def chunks(self, queryset):
+        queryset = queryset.order_by('pk').values_list('pk', flat=True)
+        while True:
+            pks = list(queryset[:self.chunk_size])
+            if not pks:
+                return
+            yield pks
+
+    def delete(self, queryset):
+        model = queryset.model
+        for pks in self.chunks(queryset):
+            for field in dependents(model):
+                self.clear_relation(field, pks)
+            file_fields = [field.attname for field in model._meta.fields
+                           if isinstance(field, models.FileField)]
+            with transaction.atomic():
+                names = []
+                if file_fields:
+                    rows = model._base_manager.filter(
+                        pk__in=pks).values_list(*file_fields)
+                    names = [name for row in rows for name in row if name]
+                raw_delete(model._base_manager.filter(pk__in=pks))
+            # Файлы удаляются только после фиксации пачки.
+            self.delete_unreferenced(names)
+            label = model._meta.label
+            self.counts[label] = self.counts.get(label, 0) + len(pks)
+            if self.progress:
+                self.progress(dict(self.counts))
+
+    def clear_relation(self, field, pks):
+        related = field.related_model._base_manager.filter(
+            **{'{}__in'.format(field.field.name): pks})
+        on_delete = field.on_delete
+        if on_delete is models.CASCADE:
+            self.delete(related)
+        elif on_delete is models.PROTECT:
+            if related.exists():
+                raise models.ProtectedError(
+                    'Cannot purge rows referenced through protected '
+                    'foreign key {}'.format(field.field), related)
+        elif on_delete is not models.DO_NOTHING:
+            # SET_NULL, SET_DEFAULT или SET(...), см. check_relations().
+            value = replacement(field)
+            for chunk in self.chunks(related):
+                field.related_model._base_manager.filter(
+                    pk__in=chunk).update(**{field.field.name: value})
+
+    def delete_unreferenced(self, names):
+        # Архивная статья делит обложку с исходной.
+        if not names:
+            return
+        used = set(Post.objects.filter(image__in=names).values_list(
+            'image', flat=True))
+        used.update(ArchivedPost.objects.filter(
+            image__in=names).values_list('image', flat=True))
+        delete_files(name for name in names if name not in used)
+
+
+def affected_scopes(posts):
+    """Области кеша лент, в которые входят статьи queryset."""
+    scopes = {SITE}
+    rows = posts.values_list('author__username', 'group__slug').distinct()
+    for username, slug in rows:
+        scopes.add(author_scope(username))
+        if slug:
+            scopes.add(group_scope(slug))
+    return scopes
+
+
+def purge_users(user_ids, chunk_size=CHUNK_SIZE, progress=None):
+    """Удаляет пользователей, их статьи, комментарии и подписки."""
+    scopes = affected_scopes(Post.objects.filter(author_id__in=user_ids))
+    scopes.update(author_scope(username) for username in
+                  User.objects.filter(pk__in=user_ids).values_list(
+                      'username', flat=True))
+    counts = Purge(chunk_size, progress).run(
+        User.objects.filter(pk__in=user_ids))
+    user_cache.forget_many(user_ids)
+    bump_scopes(scopes)
+    return counts
+
+
+def purge_groups(group_ids, chunk_size=CHUNK_SIZE, progress=None):
+    """Удаляет группы, статьи групп остаются без группы."""
+    scopes = affected_scopes(Post.objects.filter(group_id__in=group_ids))
+    scopes.update(group_scope(slug) for slug in Group.objects.filter(
+        pk__in=group_ids).values_list('slug', flat=True))
+    counts = Purge(chunk_size, progress).run(
+        Group.objects.filter(pk__in=group_ids))
+    group_cache.forget_many(group_ids)
+    bump_scopes(scopes)
+    return counts
+
+
+PURGES = {
+    User._meta.label: purge_users,
+    Group._meta.label: purge_groups,
+}
+
+
+def start_purge(model, pks, chunk_size=CHUNK_SIZE):
+    """Создает задачу удаления и запускает её в отдельном процессе.
+
+    Возвращает номер задачи. Процесс стартует после фиксации транзакции
+    запроса, иначе он может не увидеть задачу.
+    """
+    check_relations(model)
+    job = PurgeJob.objects.create(
+        model=model._meta.label, chunk_size=chunk_size,
+        object_ids=','.join(str(pk) for pk in pks))
+    transaction.on_commit(lambda: spawn(job.pk))
+    return job.pk
+
+
+def spawn(job_id):
+    # Своя сессия: сигналы серверу и его воркерам процесс не получит.
+    subprocess.Popen(
+        [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+         'purge', '--job', str(job_id)],
+        cwd=settings.BASE_DIR, stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL, start_new_session=True)
+
+
+def run_job(job, progress=None):
+    """Выполняет задачу удаления, ход пишет в её строку.
+
+    Прерванную задачу можно выполнить снова, она удалит остаток.
+    """
+    def report(counts):
+        PurgeJob.objects.filter(pk=job.pk).update(counts=json.dumps(counts))
+        if progress:
+            progress(counts)
+
+    error = ''
+    try:
+        PURGES[job.model](job_pks(job), job.chunk_size, report)
+    except Exception as exception:
+        logger.exception('Purge job %s failed', job.pk)
+        error = str(exception)
+    PurgeJob.objects.filter(pk=job.pk).update(
+        error=error, finished=timezone.now())
+    return error
+
+
+def job_pks(job):
+    return [int(pk) for pk in job.object_ids.split(',') if pk]
+
+
+def job_status(job_id):
+    """Состояние удаления для страницы админки или None."""
+    job = PurgeJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return None
+    return {'model': apps.get_model(job.model)._meta.verbose_name_plural,
+            'total': len(job_pks(job)),
+            'counts': json.loads(job.counts),
+            'done': job.finished is not None, 'error': job.error}
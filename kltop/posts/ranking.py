@@ -0,0 +1,23 @@
+"""Отбор лучших значений в строках разреженных матриц."""
+import numpy as np
+from scipy import sparse
+
+
+def top_k(scores, k):
+    """Строки, столбцы и значения k наибольших элементов каждой строки."""
+    rows = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr))
+    if not len(rows):
+        return rows, scores.indices, scores.data
+    # Целая часть ключа - номер строки, дробная - убывающая оценка:
+    # одна сортировка вместо lexsort по двум ключам.
+    key = rows + (1 - scores.data / (scores.data.max() * 2))
+    order = np.argsort(key)
+    rank = np.arange(len(order)) - scores.indptr[rows[order]]
+    best = order[rank < k]
+    return rows[best], scores.indices[best], scores.data[best]
+
+
+def prune(matrix, k):
+    """Оставляет в каждой строке csr-матрицы k наибольших значений."""
+    rows, columns, values = top_k(matrix, k)
+    return sparse.csr_matrix((values, (rows, columns)), shape=matrix.shape)
@@ -0,0 +1,92 @@
+"""Рекомендации авторов по графу подписок.
+
+Сходство двух авторов - косинусная мера по множествам их подписчиков.
+Оценка автора для пользователя - сумма сходств с авторами, на которых
+он уже подписан. Все вычисления идут на разреженных матрицах
+пользователь x автор, без циклов по ребрам графа.
+"""
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from .models import Follow, FollowSuggestion
+from .ranking import prune, top_k
+
+EDGES_CHUNK = 10000
+ROWS_CHUNK = 2000
+# Для каждого автора храним только самых похожих соседей: иначе авторы
+# с огромным числом подписчиков делают матрицу сходства почти плотной.
+NEIGHBOURS = 50
+
+
+def load_edges():
+    """Все подписки как массив пар (user_id, author_id)."""
+    pairs = Follow.objects.values_list('user_id', 'author_id').iterator(
+        chunk_size=EDGES_CHUNK)
+    edges = np.fromiter(chain.from_iterable(pairs), dtype=np.int64)
+    return edges.reshape(-1, 2)
+
+
+def author_similarity(follows):
+    """Косинусное сходство авторов по общим подписчикам."""
+    co_follows = (follows.T @ follows).tocsr()
+    norms = np.sqrt(co_follows.diagonal())
+    norms[norms == 0] = 1
+    inverse = sparse.diags(1 / norms)
+    similarity = (inverse @ co_follows @ inverse).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def compute_suggestions(edges, k):
+    """Возвращает список (user_id, author_id, score) для всех пользователей."""
+    if not len(edges):
+        return []
+    users, user_index = np.unique(edges[:, 0], return_inverse=True)
+    authors, author_index = np.unique(edges[:, 1], return_inverse=True)
+    follows = sparse.csr_matrix(
+        (np.ones(len(edges), dtype=np.float32), (user_index, author_index)),
+        shape=(len(users), len(authors)),
+    )
+    similarity = prune(author_similarity(follows), NEIGHBOURS)
+
+    # Пользователю не предлагаем его самого, если он тоже автор.
+    position = np.minimum(np.searchsorted(authors, users), len(authors) - 1)
+    is_author = authors[position] == users
+    own = sparse.csr_matrix(
+        (np.ones(is_author.sum(), dtype=np.float32),
+         (np.flatnonzero(is_author), position[is_author])),
+        shape=follows.shape,
+    )
+    excluded = follows + own
+
+    result = ([], [], [])
+    for start in range(0, len(users), ROWS_CHUNK):
+        block = slice(start, start + ROWS_CHUNK)
+        scores = (follows[block] @ similarity).tocsr()
+        # Обнуляем авторов, на которых пользователь уже подписан.
+        scores = (scores - scores.multiply(excluded[block])).tocsr()
+        scores.eliminate_zeros()
+        rows, columns, values = top_k(scores, k)
+        result[0].append(users[start + rows])
+        result[1].append(authors[columns])
+        result[2].append(values)
+    return list(zip(*(np.concatenate(part).tolist() for part in result)))
+
+
+def refresh_suggestions(k, batch_size=1000):
+    """Пересчитывает таблицу рекомендаций, возвращает число строк."""
+    suggestions = compute_suggestions(load_edges(), k)
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        for start in range(0, len(suggestions), batch_size):
+            FollowSuggestion.objects.bulk_create(
+                FollowSuggestion(user_id=user_id, author_id=author_id,
+                                 score=score)
+                for user_id, author_id, score
+                in suggestions[start:start + batch_size]
+            )
+    return len(suggestions)
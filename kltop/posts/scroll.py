@@ -0,0 +1,76 @@
+"""Бесконечная прокрутка лент.
+
+Следующая порция статей выбирается по курсору (pub_date, pk) последней
+показанной статьи, а не по номеру страницы: запрос идет по индексу и не
+пропускает строки через OFFSET, а новые статьи не сдвигают порции.
+Курсор профиля помнит, дошла ли лента до архива автора.
+"""
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+from .models import ArchivedPost
+
+FEED_ORDER = ('-pub_date', '-pk')
+LIVE, ARCHIVE = 'p', 'a'
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Больше не помещается в INTEGER SQLite.
+MAX_PK = 2 ** 63
+
+
+def encode_cursor(post):
+    source = ARCHIVE if isinstance(post, ArchivedPost) else LIVE
+    micros = (post.pub_date - EPOCH) // timedelta(microseconds=1)
+    return '{}-{}-{}'.format(source, micros, post.pk)
+
+
+def decode_cursor(token):
+    """(источник, pub_date, pk); ValueError для испорченного курсора."""
+    source, micros, pk = token.split('-')
+    pk = int(pk)
+    if source not in (LIVE, ARCHIVE) or not 0 <= pk < MAX_PK:
+        raise ValueError(token)
+    try:
+        pub_date = EPOCH + timedelta(microseconds=int(micros))
+    except OverflowError:
+        # Дата за пределами datetime.
+        raise ValueError(token)
+    return source, pub_date, pk
+
+
+def after(queryset, pub_date, pk):
+    return queryset.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+    ).order_by(*FEED_ORDER)
+
+
+def next_batch(live, cursor, size, archived=None):
+    """Статьи после курсора и курсор следующей порции или None.
+
+    archived: статьи, которые продолжают ленту после живых.
+    """
+    live = live.order_by(*FEED_ORDER)
+    source = LIVE
+    if cursor:
+        source, pub_date, pk = decode_cursor(cursor)
+    posts = []
+    if source == LIVE:
+        if cursor:
+            live = after(live, pub_date, pk)
+        posts = list(live[:size + 1])
+    if archived is not None and len(posts) <= size:
+        archived = archived.order_by(*FEED_ORDER)
+        if source == ARCHIVE:
+            archived = after(archived, pub_date, pk)
+        posts.extend(archived[:size + 1 - len(posts)])
+    # Лишняя статья нужна только чтобы узнать, есть ли продолжение.
+    has_more = len(posts) > size
+    posts = posts[:size]
+    return posts, encode_cursor(posts[-1]) if has_more else None
+
+
+def page_cursor(page_obj):
+    """Курсор для продолжения ленты после страницы паджинатора."""
+    if not page_obj.has_next():
+        return ''
+    return encode_cursor(page_obj[len(page_obj) - 1])
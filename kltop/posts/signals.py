@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import SITE, author_scope, bump_scopes, group_scope
+from .images import update_image_fields
+from .inline_images import extract_inline_images
+from .instances import group_cache
+from .live import comment_added
+from .models import Comment, Group, Post
+
+
+@receiver(post_save, sender=Post)
+def update_related_posts(sender, instance, raw=False, **kwargs):
+    """Пересчитывает похожие статьи после сохранения статьи."""
+    if raw:
+        return
+    # NumPy и SciPy нужны только при записи статей, не при старте.
+    from .similarity import update_post
+
+    transaction.on_commit(
+        lambda: update_post(instance, settings.RELATED_POSTS_TOP_K))
+
+
+@receiver(pre_save, sender=Post)
+def extract_post_images(sender, instance, raw=False, **kwargs):
+    """Выносит вставленные в текст картинки в файлы."""
+    if not raw:
+        instance.text, _ = extract_inline_images(instance.text)
+
+
+@receiver(pre_save, sender=Post)
+def inspect_post_image(sender, instance, raw=False, **kwargs):
+    """Считает размеры и заглушку новой обложки."""
+    if raw:
+        return
+    image = instance.image
+    if not image or not image._committed or instance.image_width is None:
+        update_image_fields(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю группу, чтобы сбросить и её кеши."""
+    instance._previous_group_id = None
+    if instance.pk and not raw:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_post_scopes(sender, instance, **kwargs):
+    """Сбрасывает кеши лент, в которых есть статья."""
+    group_ids = {instance.group_id,
+                 getattr(instance, '_previous_group_id', None)}
+    group_ids.discard(None)
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    bump_scopes([SITE, author_scope(instance.author.username)]
+                + [group_scope(slug) for slug in slugs])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_cached_group(sender, instance, **kwargs):
+    group_cache.forget(instance)
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment_waiters(sender, instance, created, raw=False, **kwargs):
+    """Будит ожидающих новые комментарии после фиксации транзакции."""
+    if created and not raw:
+        transaction.on_commit(lambda: comment_added(instance))
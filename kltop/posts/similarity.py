@@ -0,0 +1,185 @@
+"""Похожие статьи по TF-IDF.
+
+Полная пересборка (команда rebuild_related_posts) считает векторы всех
+статей, заполняет таблицу RelatedPost и сохраняет индекс: словарь, idf
+и матрицу векторов. При создании и правке статьи её вектор считается по
+сохраненному словарю и сравнивается с индексом, так что обновление
+стоит одного умножения разреженной матрицы на вектор. Слова, которых
+не было при пересборке, и статьи, созданные после неё, учитываются при
+следующей полной пересборке.
+"""
+import html
+import os
+import re
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils.html import strip_tags
+from scipy import sparse
+
+from .models import Post, RelatedPost
+from .ranking import top_k
+
+TOKEN = re.compile(r'\w{2,}')
+ROWS_CHUNK = 500
+# Слова из доли статей больше этой почти ничего не говорят о сходстве.
+MAX_DF = 0.5
+
+_index_cache = {}
+
+
+def tokenize(title, text):
+    document = '{} {}'.format(title, html.unescape(strip_tags(text)))
+    return TOKEN.findall(document.lower())
+
+
+def term_counts(tokens, vocabulary):
+    """Номера слов документа из словаря и их количество."""
+    columns = [vocabulary[token] for token in tokens if token in vocabulary]
+    return np.unique(np.array(columns, dtype=np.int64), return_counts=True)
+
+
+def weigh(counts, idf, columns):
+    """Логарифмический tf, умноженный на idf."""
+    return (1 + np.log(counts)) * idf[columns]
+
+
+def normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+def build_index():
+    """Векторы всех статей: (post_ids, terms, idf, matrix)."""
+    post_ids, documents = [], []
+    posts = Post.objects.values_list('id', 'title', 'text').iterator()
+    for post_id, title, text in posts:
+        post_ids.append(post_id)
+        documents.append(tokenize(title, text))
+
+    document_frequency = {}
+    for tokens in documents:
+        for token in set(tokens):
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+    limit = max(1, MAX_DF * len(documents))
+    terms = sorted(term for term, frequency in document_frequency.items()
+                   if 1 < frequency <= limit)
+    vocabulary = {term: column for column, term in enumerate(terms)}
+    frequency = np.array([document_frequency[term] for term in terms])
+    idf = np.log((1 + len(documents)) / (1 + frequency)) + 1
+
+    indptr, indices, data = [0], [], []
+    for tokens in documents:
+        columns, counts = term_counts(tokens, vocabulary)
+        indices.append(columns)
+        data.append(weigh(counts, idf, columns))
+        indptr.append(indptr[-1] + len(columns))
+    matrix = sparse.csr_matrix(
+        (np.concatenate(data or [[]]), np.concatenate(indices or [[]]),
+         indptr),
+        shape=(len(documents), len(terms)),
+    )
+    return (np.array(post_ids, dtype=np.int64), np.array(terms), idf,
+            normalize(matrix).tocsr())
+
+
+def save_index(post_ids, terms, idf, matrix):
+    np.savez(settings.RELATED_POSTS_INDEX, post_ids=post_ids, terms=terms,
+             idf=idf, data=matrix.data, indices=matrix.indices,
+             indptr=matrix.indptr, shape=matrix.shape)
+
+
+def load_index():
+    """Сохраненный индекс или None; перечитывается после пересборки."""
+    path = settings.RELATED_POSTS_INDEX
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if _index_cache.get('mtime') != mtime:
+        with np.load(path) as stored:
+            terms = stored['terms']
+            _index_cache.update(
+                mtime=mtime,
+                post_ids=stored['post_ids'],
+                vocabulary={term: column
+                            for column, term in enumerate(terms.tolist())},
+                idf=stored['idf'],
+                matrix=sparse.csr_matrix(
+                    (stored['data'], stored['indices'], stored['indptr']),
+                    shape=tuple(stored['shape'])),
+            )
+    return _index_cache
+
+
+def rebuild(k):
+    """Полностью пересчитывает RelatedPost, возвращает число связей."""
+    post_ids, terms, idf, matrix = build_index()
+    links = []
+    for start in range(0, matrix.shape[0], ROWS_CHUNK):
+        scores = (matrix[start:start + ROWS_CHUNK] @ matrix.T).tocsr()
+        # Статья не похожа сама на себя.
+        own = sparse.csr_matrix(
+            (np.ones(scores.shape[0]),
+             (np.arange(scores.shape[0]),
+              np.arange(start, start + scores.shape[0]))),
+            shape=scores.shape,
+        )
+        scores = (scores - scores.multiply(own)).tocsr()
+        scores.eliminate_zeros()
+        rows, columns, values = top_k(scores, k)
+        links.extend(zip(post_ids[start + rows].tolist(),
+                         post_ids[columns].tolist(), values.tolist()))
+
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        for start in range(0, len(links), 1000):
+            RelatedPost.objects.bulk_create(
+                RelatedPost(post_id=post_id, related_id=related_id,
+                            score=score)
+                for post_id, related_id, score in links[start:start + 1000]
+            )
+    save_index(post_ids, terms, idf, matrix)
+    return len(links)
+
+
+def update_post(post, k):
+    """Обновляет похожие статьи для одной созданной или измененной статьи."""
+    index = load_index()
+    if index is None:
+        return
+    columns, counts = term_counts(tokenize(post.title, post.text),
+                                  index['vocabulary'])
+    vector = np.zeros(len(index['idf']))
+    vector[columns] = weigh(counts, index['idf'], columns)
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    scores = index['matrix'] @ vector
+    scores[index['post_ids'] == post.pk] = 0
+    best = np.argsort(-scores)[:k]
+    best = best[scores[best] > 0]
+    neighbours = dict(zip(index['post_ids'][best].tolist(),
+                          scores[best].tolist()))
+    # Статьи из индекса могли быть удалены после пересборки.
+    existing = set(Post.objects.filter(
+        pk__in=list(neighbours)).values_list('pk', flat=True))
+    neighbours = {pk: score for pk, score in neighbours.items()
+                  if pk in existing}
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(post=post).delete()
+        RelatedPost.objects.filter(related=post).delete()
+        RelatedPost.objects.bulk_create(
+            RelatedPost(post=post, related_id=pk, score=score)
+            for pk, score in neighbours.items())
+        # Добавляем статью в списки соседей, если она в их top-k.
+        for pk, score in neighbours.items():
+            links = list(RelatedPost.objects.filter(post_id=pk))
+            if len(links) >= k and links[-1].score >= score:
+                continue
+            RelatedPost.objects.create(post_id=pk, related=post, score=score)
+            for link in links[k - 1:]:
+                link.delete()
@@ -0,0 +1,51 @@
+from django import template
+from django.conf import settings
+
+from ..thumbnails import COVER_GEOMETRY, FALLBACK_FORMAT, prefetch_covers
+
+register = template.Library()
+
+MIME_TYPES = {'WEBP': 'image/webp', 'PNG': 'image/png'}
+
+
+def srcset(urls, image_format):
+    return ', '.join('{} {}w'.format(url, size)
+                     for (candidate, size), url in sorted(urls.items())
+                     if candidate == image_format)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def responsive_image(post, geometry=COVER_GEOMETRY, sizes='100vw',
+                     css_class='', style=''):
+    """Обложка статьи в <picture> с несколькими ширинами и форматами.
+
+    Формат выбирает браузер по type у <source>, а не сервер по Accept,
+    поэтому разметку можно кешировать. Версии обложек страницы лучше
+    найти заранее через prefetch_covers, иначе тег ищет их сам.
+    """
+    if not post.image:
+        return {}
+    if geometry not in getattr(post, 'covers', {}):
+        prefetch_covers([post], geometry)
+    cover = post.covers[geometry]
+    sources = []
+    for image_format in settings.RESPONSIVE_IMAGE_FORMATS:
+        candidates = srcset(cover['urls'], image_format)
+        if candidates:
+            sources.append({'type': MIME_TYPES[image_format],
+                            'srcset': candidates})
+    fallback = [url for (image_format, _), url in sorted(cover['urls'].items())
+                if image_format == FALLBACK_FORMAT]
+    return {
+        'sources': sources,
+        # Пока версий нет, показываем исходную обложку.
+        'src': fallback[-1] if fallback else post.image.url,
+        'srcset': srcset(cover['urls'], FALLBACK_FORMAT),
+        'sizes': sizes,
+        'width': cover['width'],
+        'height': cover['height'],
+        'placeholder': post.image_placeholder,
+        'alt': post.title,
+        'css_class': css_class,
+        'style': style,
+    }
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import ArchivedComment, ArchivedPost, Comment, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.old_post = Post.objects.create(
+            author=cls.user, title='Старая статья', text='Давний текст')
+        Comment.objects.create(post=cls.old_post, author=cls.user,
+                               text='Старый комментарий')
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        cls.new_post = Post.objects.create(
+            author=cls.user, title='Новая статья', text='Свежий текст')
+
+    def setUp(self):
+        cache.clear()
+        self.archived = archive_posts(timezone.now() - timedelta(days=365),
+                                      batch_size=1)
+
+    def test_old_posts_moved(self):
+        self.assertEqual(self.archived, 1)
+        self.assertFalse(Post.objects.filter(pk=self.old_post.pk).exists())
+        self.assertTrue(Post.objects.filter(pk=self.new_post.pk).exists())
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.title, 'Старая статья')
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedComment.objects.get().post, archived)
+
+    def test_archived_post_detail(self):
+        """Статья из архива открывается по прежнему адресу без формы."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old_post.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotIn('form', response.context)
+
+    def test_profile_continues_into_archive(self):
+        response = self.client.get(
+            reverse('posts:profile', args=[self.user.username]))
+        self.assertEqual(
+            [post.title for post in response.context['page_obj']],
+            ['Новая статья', 'Старая статья'])
+        self.assertEqual(response.context['num_of_posts'], 2)
+
+    def test_index_shows_only_live_posts(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.new_post.pk])
+
+    def test_command_progress(self):
+        """С -v2 команда печатает ход переноса."""
+        post = Post.objects.create(
+            author=self.user, title='Еще одна', text='Текст')
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        out = StringIO()
+        call_command('archive_posts', days=365, verbosity=2, stdout=out)
+        self.assertIn('1 posts archived', out.getvalue())
+        self.assertIn('Archived 1 posts', out.getvalue())
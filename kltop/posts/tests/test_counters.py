@@ -0,0 +1,63 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import counters
+from ..models import Post
+
+User = get_user_model()
+
+
+class ViewCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.fresh_post = Post.objects.create(
+            author=cls.user, title='Свежая', text='Свежая статья')
+        cls.old_post = Post.objects.create(
+            author=cls.user, title='Старая', text='Старая статья')
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=3))
+
+    def setUp(self):
+        counters.flush()
+
+    def test_views_buffered_until_flush(self):
+        """Просмотры попадают в базу только при сбросе буфера."""
+        for _ in range(3):
+            counters.record_view(self.fresh_post.pk)
+        counters.record_view(self.old_post.pk)
+        self.fresh_post.refresh_from_db()
+        self.assertEqual(self.fresh_post.views, 0)
+        self.assertEqual(counters.flush(), 2)
+        self.fresh_post.refresh_from_db()
+        self.old_post.refresh_from_db()
+        self.assertEqual(self.fresh_post.views, 3)
+        self.assertEqual(self.old_post.views, 1)
+
+    def test_failed_flush_keeps_views(self):
+        """Если база заблокирована, просмотры остаются в буфере."""
+        counters.record_view(self.fresh_post.pk)
+        with mock.patch.object(counters, 'save',
+                               side_effect=OperationalError('locked')), \
+                self.assertLogs('posts.counters', 'WARNING'):
+            self.assertEqual(counters.flush(), 0)
+        self.assertEqual(counters.flush(), 1)
+        self.fresh_post.refresh_from_db()
+        self.assertEqual(self.fresh_post.views, 1)
+
+    def test_popular_feed_ranked_by_decayed_score(self):
+        """При равных просмотрах свежая статья выше старой."""
+        Post.objects.update(views=10)
+        counters.refresh_popularity()
+        response = self.authorized_client.get(reverse('posts:popular_index'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.fresh_post, self.old_post])
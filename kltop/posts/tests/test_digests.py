@@ -0,0 +1,53 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..digests import send_digests
+from ..models import DigestDelivery, Follow, Post
+
+User = get_user_model()
+DAY = timedelta(days=1)
+
+
+class DigestsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com')
+        cls.no_email = User.objects.create_user(username='no_email')
+        cls.author = User.objects.create_user(username='author')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.no_email, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, title='Новая статья', text='Текст')
+
+    def test_digest_sent_once(self):
+        """Письмо уходит подписчику с email, повтор ничего не шлет."""
+        self.assertEqual(send_digests(DAY), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertIn('Новая статья', mail.outbox[0].body)
+        self.assertIn(f'/posts/{self.post.pk}/', mail.outbox[0].body)
+        self.assertTrue(
+            DigestDelivery.objects.filter(user=self.reader).exists())
+        self.assertEqual(send_digests(DAY), 0)
+
+    def test_new_post_after_digest(self):
+        """После отправки в следующий дайджест попадут только новые статьи."""
+        send_digests(DAY)
+        Post.objects.create(author=self.author, title='Еще одна', text='Т')
+        self.assertEqual(send_digests(DAY), 1)
+        self.assertIn('Еще одна', mail.outbox[-1].body)
+        self.assertNotIn('Новая статья', mail.outbox[-1].body)
+
+    def test_command_progress(self):
+        """С -v2 команда печатает ход рассылки."""
+        out = StringIO()
+        call_command('send_digests', verbosity=2, stdout=out)
+        self.assertIn('Users up to pk=', out.getvalue())
+        self.assertIn('Sent 1 digests', out.getvalue())
@@ -0,0 +1,92 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.cache import FileBasedCache
+
+from ..caching import (SITE, group_scope, new_version, scope_version,
+                       version_key)
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, title='Статья в ленте',
+            text='<p>Текст статьи</p>')
+        cls.FEEDS = [
+            reverse('posts:feed_rss'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_feed_rss', args=[cls.group.slug]),
+            reverse('posts:group_feed_atom', args=[cls.group.slug]),
+            reverse('posts:profile_feed_rss', args=[cls.user.username]),
+            reverse('posts:profile_feed_atom', args=[cls.user.username]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_contain_post(self):
+        for url in self.FEEDS:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Статья в ленте')
+                self.assertTrue(response['ETag'])
+
+    def test_conditional_get(self):
+        """Повторный опрос с ETag не трогает базу и дает 304."""
+        url = reverse('posts:group_feed_rss', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_post_write_invalidates_feed(self):
+        """Новая статья группы сбрасывает кеш ленты группы."""
+        url = reverse('posts:group_feed_rss', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(author=self.user, group=self.group,
+                            title='Совсем новая', text='Текст')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Совсем новая')
+
+    def test_bump_from_other_process(self):
+        """Версию области, поднятую командой manage.py, видят воркеры."""
+        url = reverse('posts:group_feed_rss', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        other = FileBasedCache(settings.CACHES['default']['LOCATION'], {})
+        other.set(version_key(group_scope(self.group.slug)), new_version())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_scope_version_expires(self):
+        scope_version(SITE)
+        expiry, _ = cache.read(version_key(SITE))
+        self.assertLessEqual(
+            expiry, time.time() + settings.SCOPE_VERSION_TIMEOUT)
+
+    def test_scope_version_culled_after_add(self):
+        """Версия есть, даже если ключ вытеснен сразу после add()."""
+        with mock.patch.object(cache, 'get', return_value=None):
+            self.assertIsInstance(scope_version(SITE), int)
+            response = self.client.get(reverse('posts:feed_rss'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_group(self):
+        response = self.client.get(
+            reverse('posts:group_feed_rss', args=['unknown']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,61 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def cover(width, height):
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), 'blue').save(output, 'JPEG')
+    return SimpleUploadedFile('cover.jpg', output.getvalue(),
+                              content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_cover_inspected_on_save(self):
+        """При сохранении статьи запоминаются размеры и заглушка."""
+        post = Post.objects.create(author=self.user, title='Обложка',
+                                   text='Текст', image=cover(200, 100))
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (200, 100))
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/webp;base64,'))
+        post.image = ''
+        post.save()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_backfill_command(self):
+        """Команда заполняет размеры старых обложек."""
+        post = Post.objects.create(author=self.user, title='Старая',
+                                   text='Текст', image=cover(30, 20))
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None, image_placeholder='')
+        out = io.StringIO()
+        call_command('backfill_images', stdout=out)
+        self.assertIn('Updated 1 covers', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (30, 20))
+        self.assertNotEqual(post.image_placeholder, '')
@@ -0,0 +1,81 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..inline_images import INLINE_DIR
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def data_uri(width, height, image_format='PNG'):
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(output, image_format)
+    return 'data:image/{};base64,{}'.format(
+        image_format.lower(), base64.b64encode(output.getvalue()).decode())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, INLINE_IMAGE_MAX_WIDTH=100)
+class InlineImagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_image_extracted_on_save(self):
+        """Картинка из текста сохраняется файлом, тег ссылается на него."""
+        post = Post.objects.create(
+            author=self.user, title='Картинка',
+            text='<p><img style="width: 50%;" src="{}" alt="x"></p>'.format(
+                data_uri(40, 30)))
+        text = Post.objects.get(pk=post.pk).text
+        self.assertNotIn('data:image', text)
+        self.assertIn('width="40" height="30" loading="lazy"', text)
+        self.assertIn('style="width: 50%;"', text)
+        self.assertIn('alt="x"', text)
+        name = text.split(settings.MEDIA_URL)[1].split('"')[0]
+        self.assertTrue(name.startswith(INLINE_DIR))
+        self.assertTrue(default_storage.exists(name))
+
+    def test_wide_image_resized(self):
+        """Широкая картинка уменьшается до INLINE_IMAGE_MAX_WIDTH."""
+        post = Post.objects.create(
+            author=self.user, title='Широкая',
+            text='<img src="{}">'.format(data_uri(400, 200, 'JPEG')))
+        self.assertIn('width="100" height="50"', post.text)
+
+    def test_broken_image_kept(self):
+        """Испорченная картинка остается в тексте как была."""
+        text = '<img src="data:image/png;base64,AAAA">'
+        with self.assertLogs('posts.inline_images', 'WARNING'):
+            post = Post.objects.create(author=self.user, title='Битая',
+                                       text=text)
+        self.assertEqual(post.text, text)
+
+    def test_command_processes_saved_posts(self):
+        """Команда выносит картинки из уже сохраненных статей."""
+        post = Post.objects.create(author=self.user, title='Старая',
+                                   text='Текст')
+        text = '<img src="{}"> и <img src="{}">'.format(
+            data_uri(10, 10), data_uri(10, 10))
+        Post.objects.filter(pk=post.pk).update(text=text)
+        out = io.StringIO()
+        call_command('extract_inline_images', stdout=out)
+        self.assertIn('Extracted 2 images from 1 posts', out.getvalue())
+        post.refresh_from_db()
+        self.assertNotIn('data:image', post.text)
+        self.assertEqual(post.text.count('loading="lazy"'), 2)
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import memcache_key_warnings
+from django.test import TestCase
+from django.urls import reverse
+
+from ..instances import group_cache, hydrate, user_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class InstanceCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_natural_key_lookup_cached(self):
+        group_cache.get('test-slug')
+        with self.assertNumQueries(0):
+            self.assertEqual(group_cache.get('test-slug'), self.group)
+            self.assertEqual(group_cache.get_by_pk(self.group.pk),
+                             self.group)
+
+    def test_missing_object_cached(self):
+        """Повторный 404 не обращается к базе, создание объекта его снимает."""
+        self.assertIsNone(group_cache.get('new-slug'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(group_cache.get('new-slug'))
+        group = Group.objects.create(title='Новая', slug='new-slug')
+        self.assertEqual(group_cache.get('new-slug'), group)
+
+    def test_natural_key_safe_for_memcached(self):
+        """Пробелы, кириллица и длина имени не попадают в ключ кеша."""
+        key = user_cache.natural_cache_key('Иван Петров ' * 30)
+        self.assertEqual(list(memcache_key_warnings(cache.make_key(key))),
+                         [])
+
+    def test_rename_invalidates(self):
+        user_cache.get('auth')
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertIsNone(user_cache.get('auth'))
+        self.assertEqual(user_cache.get('renamed').pk, self.user.pk)
+        self.user.username = 'auth'
+        self.user.save()
+
+    def test_hydrate_posts(self):
+        """Авторы и группы списка статей подставляются без запросов."""
+        for i in range(3):
+            Post.objects.create(author=self.user, group=self.group,
+                                text='Текст {}'.format(i))
+        hydrate(Post.objects.all())
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(0):
+            hydrate(posts)
+            self.assertEqual({post.author.username for post in posts},
+                             {'auth'})
+            self.assertEqual({post.group.slug for post in posts},
+                             {'test-slug'})
+
+    def test_unknown_group_page(self):
+        url = reverse('posts:group_list', args=['unknown'])
+        self.assertEqual(self.client.get(url).status_code, 404)
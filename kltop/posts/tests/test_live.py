@@ -0,0 +1,96 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import live
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentsPollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+        cls.first = Comment.objects.create(post=cls.post, author=cls.user,
+                                           text='Первый')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:comments_poll', args=[self.post.pk])
+
+    def test_returns_comments_after_cursor(self):
+        second = Comment.objects.create(post=self.post, author=self.user,
+                                        text='Второй')
+        data = self.client.get(self.url, {'after': self.first.pk}).json()
+        self.assertEqual([comment['text'] for comment in data['comments']],
+                         ['Второй'])
+        self.assertEqual(data['cursor'], second.pk)
+
+    def test_unchanged_cursor_answered_from_cache(self):
+        """Повторный опрос без новых комментариев: 304 без запросов."""
+        response = self.client.get(self.url, {'after': self.first.pk})
+        self.assertEqual(response.json()['comments'], [])
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.url, {'after': self.first.pk},
+                HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_capped_answer_continues(self):
+        """После ответа, урезанного до лимита, приходит остаток."""
+        second = Comment.objects.create(post=self.post, author=self.user,
+                                        text='Второй')
+        with mock.patch('posts.views.COMMENTS_PER_POLL', 1):
+            response = self.client.get(self.url, {'after': 0})
+            self.assertEqual(response.json()['cursor'], self.first.pk)
+            response = self.client.get(
+                self.url, {'after': self.first.pk},
+                HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['cursor'], second.pk)
+
+    def test_post_detail_has_cursor(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertEqual(response.context['comments_cursor'], self.first.pk)
+        self.assertContains(response, 'js/comments.js')
+
+
+class WaitForCommentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+        cls.first = Comment.objects.create(post=cls.post, author=cls.user,
+                                           text='Первый')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_woken_by_new_comment(self):
+        """Ожидание заканчивается сразу после сигнала о комментарии."""
+        self.assertEqual(live.latest_comment_id(self.post.pk), self.first.pk)
+        # Сигнал приходит после фиксации, в тесте его шлет таймер.
+        second = Comment.objects.create(post=self.post, author=self.user,
+                                        text='Второй')
+        timer = threading.Timer(0.1, live.comment_added, [second])
+        timer.start()
+        start = time.monotonic()
+        self.assertEqual(
+            live.wait_for_comments(self.post.pk, self.first.pk, timeout=10),
+            second.pk)
+        self.assertLess(time.monotonic() - start, live.WAKE_STEP)
+        timer.join()
+
+    def test_timeout(self):
+        self.assertEqual(
+            live.wait_for_comments(self.post.pk, self.first.pk,
+                                   timeout=0.05),
+            self.first.pk)
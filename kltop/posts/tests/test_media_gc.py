@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from ..media_gc import collect
+from ..models import Post
+from .test_images import cover
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+INLINE = 'posts/inline/{}.png'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGcTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        user = User.objects.create_user(username='auth')
+        self.cover = self.save('posts/cover.jpg', cover(10, 10).read())
+        self.orphan = self.save('posts/deleted.jpg')
+        self.inline = self.save(INLINE.format('a' * 40))
+        self.inline_orphan = self.save(INLINE.format('b' * 40))
+        self.young = self.save('posts/uploading.jpg', age=0)
+        Post.objects.create(
+            author=user, title='Статья', image=self.cover,
+            text='<img src="{}{}">'.format(settings.MEDIA_URL, self.inline))
+
+    def save(self, name, content=b'x' * 100, age=2 * 24 * 60 * 60):
+        name = default_storage.save(name, ContentFile(content))
+        moment = time.time() - age
+        os.utime(default_storage.path(name), (moment, moment))
+        return name
+
+    def test_dry_run_counts_only(self):
+        """Пробный запуск находит сирот, ничего не удаляя, и проверяет
+        файлы пачками, а не по запросу на файл."""
+        with self.assertNumQueries(4):
+            stats = collect(grace=timedelta(hours=1), dry_run=True)
+        self.assertEqual(stats.scanned, 5)
+        self.assertEqual(stats.young, 1)
+        self.assertEqual(stats.orphans, 2)
+        self.assertEqual(stats.orphan_bytes, 200)
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_orphans_deleted(self):
+        """Удаляются только старые файлы без ссылок и их миниатюры."""
+        source = ImageFile(self.orphan, default.storage)
+        thumbnail = ImageFile(self.save('cache/ab/cd/thumbnail.jpg'),
+                              default.storage)
+        for image in (source, thumbnail):
+            image.set_size((10, 10))
+        default.kvstore.set(source)
+        default.kvstore.set(thumbnail, source)
+        collect(grace=timedelta(hours=1), batch_size=2)
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertFalse(default_storage.exists(thumbnail.name))
+        self.assertIsNone(default.kvstore.get(source))
+        self.assertFalse(default_storage.exists(self.inline_orphan))
+        for name in (self.cover, self.inline, self.young):
+            self.assertTrue(default_storage.exists(name))
+
+    def test_command(self):
+        """Команда печатает итог и скорость обхода."""
+        out = StringIO()
+        call_command('gc_media', '--dry-run', '--grace-hours', '1',
+                     stdout=out)
+        self.assertIn('Found 2 orphaned files', out.getvalue())
+        self.assertIn('of 5 scanned', out.getvalue())
+        self.assertIn('files/s', out.getvalue())
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.cache import FileBasedCache
+
+from ..caching import SITE, new_version, version_key
+from ..models import Post
+from ..pagination import (ELLIPSIS, CachedCountPaginator, cached_count,
+                          elided_page_range)
+
+User = get_user_model()
+
+
+class ElidedPageRangeTests(TestCase):
+    def test_short_range_is_complete(self):
+        self.assertEqual(list(elided_page_range(3, 5)), [1, 2, 3, 4, 5])
+
+    def test_window_around_current_page(self):
+        self.assertEqual(
+            list(elided_page_range(50, 10000)),
+            [1, 2, ELLIPSIS, 47, 48, 49, 50, 51, 52, 53, ELLIPSIS,
+             9999, 10000])
+
+    def test_edges(self):
+        self.assertEqual(
+            list(elided_page_range(1, 100)),
+            [1, 2, 3, 4, ELLIPSIS, 99, 100])
+        self.assertEqual(
+            list(elided_page_range(100, 100)),
+            [1, 2, ELLIPSIS, 97, 98, 99, 100])
+
+
+class CachedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Первая')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        """Повторный подсчет берется из кеша без запроса к базе."""
+        self.assertEqual(cached_count(SITE, Post.objects.all()), 1)
+        with self.assertNumQueries(0):
+            paginator = CachedCountPaginator(Post.objects.all(), 10,
+                                             scope=SITE)
+            self.assertEqual(paginator.count, 1)
+
+    def test_post_write_invalidates_count(self):
+        cached_count(SITE, Post.objects.all())
+        Post.objects.create(author=self.user, text='Вторая')
+        self.assertEqual(cached_count(SITE, Post.objects.all()), 2)
+
+    def test_write_in_other_worker_invalidates_count(self):
+        """Число сбрасывается и записью статьи в другом процессе."""
+        cached_count(SITE, Post.objects.all())
+        Post.objects.bulk_create([Post(author=self.user, text='Вторая')])
+        other = FileBasedCache(settings.CACHES['default']['LOCATION'], {})
+        other.set(version_key(SITE), new_version())
+        self.assertEqual(cached_count(SITE, Post.objects.all()), 2)
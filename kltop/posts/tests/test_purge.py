@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from users.backends import user_cache_key
+
+from ..models import Comment, Follow, Group, Post
+from ..purge import job_status, purge_groups, purge_users, start_purge
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PurgeTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='prolific')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.posts = [
+            Post.objects.create(
+                author=self.user, group=self.group, title='Статья',
+                text='Текст {}'.format(i))
+            for i in range(5)
+        ]
+        self.post_with_image = Post.objects.create(
+            author=self.user, title='С обложкой', text='Текст',
+            image=SimpleUploadedFile('purge.gif', SMALL_GIF, 'image/gif'))
+        self.reader_post = Post.objects.create(
+            author=self.reader, group=self.group, text='Чужая статья')
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.reader, text='Да')
+        Comment.objects.create(post=self.reader_post, author=self.user,
+                               text='Комментарий автора')
+        Follow.objects.create(user=self.reader, author=self.user)
+
+    def test_purge_user(self):
+        """Удаляются пользователь и все зависимые строки, пачками."""
+        image = self.post_with_image.image.name
+        cache.set(user_cache_key(self.user.pk), self.user)
+        counts = purge_users([self.user.pk], chunk_size=2)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Post.objects.filter(author_id=self.user.pk).exists())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(counts['posts.Post'], 6)
+        self.assertFalse(default_storage.exists(image))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_purge_group_keeps_posts(self):
+        purge_groups([self.group.pk])
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.count(), 7)
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+
+    def test_command_progress(self):
+        """С -v2 команда печатает счетчики после каждой пачки."""
+        out = StringIO()
+        call_command('purge', '--user', 'prolific', '--chunk-size', '2',
+                     verbosity=2, stdout=out)
+        self.assertIn('posts.Post=2', out.getvalue())
+        self.assertIn('posts.Post: 6 rows deleted', out.getvalue())
+
+    def test_admin_job_runs_in_command(self):
+        """Задача из админки выполняется командой, ход читается из базы."""
+        job_id = start_purge(User, [self.user.pk], chunk_size=2)
+        self.assertFalse(job_status(job_id)['done'])
+        call_command('purge', '--pending', stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        status = job_status(job_id)
+        self.assertTrue(status['done'])
+        self.assertEqual(status['error'], '')
+        self.assertEqual(status['counts']['posts.Post'], 6)
+        self.assertIsNone(job_status(job_id + 1))
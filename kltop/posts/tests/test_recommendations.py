@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class FollowSuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Два читателя подписаны на общего автора, второй еще на одного."""
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other_reader = User.objects.create_user(username='other_reader')
+        cls.common_author = User.objects.create_user(username='common')
+        cls.new_author = User.objects.create_user(username='new_author')
+        Follow.objects.create(user=cls.reader, author=cls.common_author)
+        Follow.objects.create(user=cls.other_reader, author=cls.common_author)
+        Follow.objects.create(user=cls.other_reader, author=cls.new_author)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.reader)
+
+    def test_refresh_suggests_co_followed_author(self):
+        """Читателю предлагается автор, на которого подписаны похожие."""
+        call_command('refresh_follow_suggestions', stdout=StringIO())
+        suggested = FollowSuggestion.objects.filter(user=self.reader)
+        self.assertEqual([s.author for s in suggested], [self.new_author])
+        self.assertFalse(FollowSuggestion.objects.filter(
+            user=self.other_reader).exists())
+
+    def test_follow_page_shows_suggestions(self):
+        """Рекомендации выводятся на странице подписок."""
+        FollowSuggestion.objects.create(
+            user=self.reader, author=self.new_author, score=1)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [s.author for s in response.context['suggestions']],
+            [self.new_author])
+        self.assertContains(response, self.new_author.username)
+
+    def test_followed_author_not_suggested(self):
+        """Автор пропадает из рекомендаций сразу после подписки."""
+        FollowSuggestion.objects.create(
+            user=self.reader, author=self.new_author, score=1)
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', args=[self.new_author.username]))
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['suggestions']), [])
@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import ArchivedPost, Group, Post
+from ..scroll import decode_cursor, encode_cursor, next_batch
+
+User = get_user_model()
+
+PAGE = 10
+
+
+class ScrollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='scroll', description='Описание')
+        now = timezone.now()
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, title=str(number),
+                 text='Текст {}'.format(number),
+                 pub_date=now - timedelta(minutes=number // 2))
+            for number in range(25))
+
+    def setUp(self):
+        cache.clear()
+
+    def link(self, pk):
+        return 'href="{}"'.format(reverse('posts:post_detail', args=[pk]))
+
+    def fetch(self, url, cursor=''):
+        response = self.client.get(url, {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_round_trip(self):
+        """Курсор восстанавливает дату и номер статьи."""
+        post = Post.objects.first()
+        source, pub_date, pk = decode_cursor(encode_cursor(post))
+        self.assertEqual((pub_date, pk), (post.pub_date, post.pk))
+        with self.assertRaises(ValueError):
+            decode_cursor('p-oops')
+
+    def test_batches_cover_feed_without_overlap(self):
+        """Порции ленты идут подряд без повторов и пропусков."""
+        seen, cursor = [], None
+        while True:
+            posts, cursor = next_batch(Post.objects.all(), cursor, PAGE)
+            seen.extend(post.pk for post in posts)
+            if cursor is None:
+                break
+        expected = list(Post.objects.order_by('-pub_date', '-pk')
+                        .values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_fragment_continues_first_page(self):
+        """Первый фрагмент продолжает ленту после первой страницы."""
+        response = self.client.get(reverse('posts:group_list',
+                                           args=[self.group.slug]))
+        cursor = str(response.context['page_obj'].next_cursor())
+        data = self.fetch(reverse('posts:group_fragment',
+                                  args=[self.group.slug]), cursor)
+        first_page = {post.pk for post in response.context['page_obj']}
+        self.assertEqual(data['html'].count('<hr>'), PAGE)
+        self.assertIsNotNone(data['next'])
+        for pk in first_page:
+            self.assertNotIn(self.link(pk), data['html'])
+
+    def test_profile_continues_into_archive(self):
+        """Лента профиля после живых статей переходит в архив."""
+        Post.objects.filter(title__in=['23', '24']).update(
+            pub_date=timezone.now() - timedelta(days=400))
+        archive_posts(timezone.now() - timedelta(days=365))
+        url = reverse('posts:profile_fragment', args=[self.user.username])
+        cursor, html = '', ''
+        while cursor is not None:
+            data = self.fetch(url, cursor)
+            html += data['html']
+            cursor = data['next']
+        self.assertEqual(html.count('<hr>'), 25)
+        for pk in ArchivedPost.objects.values_list('pk', flat=True):
+            self.assertIn(self.link(pk), html)
+
+    def test_bad_cursor(self):
+        """Испорченный курсор дает 400."""
+        self.client.force_login(self.user)
+        for cursor in ('x-1-2', 'p-99999999999999999999-1',
+                       'p-1-99999999999999999999'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:index_fragment'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_feed_fragments_require_login(self):
+        """Ленты сайта и подписок, как и их страницы, только для своих."""
+        for name in ('posts:index_fragment', 'posts:follow_fragment'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 302)
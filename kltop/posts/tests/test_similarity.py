@@ -0,0 +1,69 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, RelatedPost
+from ..similarity import update_post
+
+User = get_user_model()
+TEMP_INDEX = os.path.join(tempfile.mkdtemp(), 'related_posts.npz')
+
+
+@override_settings(RELATED_POSTS_INDEX=TEMP_INDEX)
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        texts = {
+            'Django': '<p>Миграции django и модели django</p>',
+            'Модели': '<p>Модели django и запросы к базе</p>',
+            'Кухня': '<p>Рецепт борща со свеклой</p>',
+            'Суп': '<p>Рецепт супа со свеклой</p>',
+        }
+        cls.posts = {
+            title: Post.objects.create(author=cls.user, title=title,
+                                       text=text)
+            for title, text in texts.items()
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if os.path.exists(TEMP_INDEX):
+            os.remove(TEMP_INDEX)
+
+    def related_titles(self, title):
+        return [link.related.title for link in RelatedPost.objects.filter(
+            post=self.posts[title])]
+
+    def test_rebuild_links_similar_posts(self):
+        """Пересборка связывает статьи с общими словами."""
+        call_command('rebuild_related_posts', stdout=StringIO())
+        self.assertEqual(self.related_titles('Django'), ['Модели'])
+        self.assertEqual(self.related_titles('Кухня'), ['Суп'])
+
+    def test_update_new_post(self):
+        """Новая статья получает соседей по сохраненному индексу."""
+        call_command('rebuild_related_posts', stdout=StringIO())
+        post = Post.objects.create(author=self.user, title='Борщ',
+                                   text='Еще один рецепт борща')
+        update_post(post, k=5)
+        self.posts['Борщ'] = post
+        self.assertIn('Кухня', self.related_titles('Борщ'))
+        self.assertIn('Борщ', self.related_titles('Кухня'))
+
+    def test_post_detail_shows_related(self):
+        call_command('rebuild_related_posts', stdout=StringIO())
+        self.client.force_login(self.user)
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts['Суп'].pk}))
+        self.assertContains(response, 'Похожие статьи')
+        self.assertEqual(
+            [link.related for link in response.context['related_posts']],
+            [self.posts['Кухня']])
@@ -0,0 +1,135 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from .. import thumbnails
+from ..models import Post
+from .test_images import cover
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def create_thumbnail(source_image, geometry, options, thumbnail):
+    """Вместо движка sorl: сохраняет под именем версии картинку 1x1."""
+    default.storage.save(thumbnail.name, cover(1, 1))
+    thumbnail.set_size((1, 1))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   RESPONSIVE_IMAGE_WIDTHS=[320, 640],
+                   RESPONSIVE_IMAGE_FORMATS=['WEBP'])
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(author=cls.user, title=str(number),
+                                text='Текст', image=cover(800, 400))
+            for number in range(3)]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        # Готовы все версии, кроме WebP шириной 960.
+        for post in self.posts:
+            _, _, versions = thumbnails.cover_versions(
+                post, thumbnails.COVER_GEOMETRY)
+            for image_format, size, version, options in versions:
+                if (image_format, size) == ('WEBP', 960):
+                    continue
+                file = thumbnails.thumbnail_file(post.image, version,
+                                                 options)
+                file.set_size((size, round(size * 339 / 960)))
+                default.kvstore.set(file)
+        cache.clear()
+
+    def test_page_resolved_with_one_query(self):
+        """Версии обложек страницы находятся одним запросом."""
+        posts = list(Post.objects.filter(pk__in=[
+            post.pk for post in self.posts]))
+        with self.assertNumQueries(1):
+            thumbnails.prefetch_covers(posts)
+        urls = posts[0].covers[thumbnails.COVER_GEOMETRY]['urls']
+        self.assertEqual(sorted(urls), [
+            ('JPEG', 320), ('JPEG', 640), ('JPEG', 960),
+            ('WEBP', 320), ('WEBP', 640)])
+        with self.assertNumQueries(0):
+            thumbnails.prefetch_covers(posts)
+
+    def test_missing_versions_created_by_command(self):
+        """Недостающие версии создает команда, а не отрисовка страницы."""
+        with mock.patch.object(default.backend, '_create_thumbnail',
+                               side_effect=create_thumbnail) as create:
+            thumbnails.prefetch_covers(self.posts)
+            create.assert_not_called()
+            out = StringIO()
+            call_command('generate_thumbnails', '--batch-size', '2',
+                         verbosity=2, stdout=out)
+            # WebP 960 обложки и 6 версий для страницы статьи на каждую.
+            self.assertEqual(create.call_count, 21)
+            self.assertIn('14 versions created, 0 failed', out.getvalue())
+            self.assertIn('Created 21 versions, 0 failed', out.getvalue())
+            self.assertEqual(thumbnails.generate_missing(), (0, 0))
+        posts = list(Post.objects.filter(pk__in=[
+            post.pk for post in self.posts]))
+        thumbnails.prefetch_covers(posts)
+        urls = posts[0].covers[thumbnails.COVER_GEOMETRY]['urls']
+        self.assertIn(('WEBP', 960), urls)
+
+    def test_failure_remembered(self):
+        """Обложка с ошибкой пропускается до --retry-failed."""
+        with mock.patch.object(default.backend, '_create_thumbnail',
+                               side_effect=OSError) as create, \
+                self.assertLogs('posts.thumbnails', 'ERROR'):
+            self.assertEqual(thumbnails.generate_missing(), (0, 3))
+            self.assertEqual(create.call_count, 3)
+            self.assertEqual(thumbnails.generate_missing(), (0, 0))
+            self.assertEqual(create.call_count, 3)
+            self.assertEqual(thumbnails.generate_missing(retry_failed=True),
+                             (0, 3))
+
+    def test_names_match_sorl(self):
+        """thumbnail_file называет версии так же, как get_thumbnail."""
+        post = self.posts[0]
+        with mock.patch.object(default.backend, '_create_thumbnail',
+                               side_effect=create_thumbnail):
+            for geometry in thumbnails.GEOMETRIES:
+                _, _, versions = thumbnails.cover_versions(post, geometry)
+                for _, _, version, options in versions:
+                    self.assertEqual(
+                        get_thumbnail(post.image, version, **options).name,
+                        thumbnails.thumbnail_file(
+                            post.image, version, options).name)
+
+    def test_responsive_image_tag(self):
+        """Тег отдает srcset в WebP и JPEG, размеры и заглушку."""
+        post = self.posts[0]
+        html = Template(
+            '{% load post_images %}{% responsive_image post %}'
+        ).render(Context({'post': post}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertEqual(html.count(' 320w'), 2)
+        self.assertEqual(html.count(' 960w'), 1)
+        self.assertIn('width="960" height="339"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn(post.image_placeholder, html)
+        html = Template(
+            '{% load post_images %}{% responsive_image post "1280" %}'
+        ).render(Context({'post': post}))
+        self.assertIn('width="800" height="400"', html)
+        self.assertIn('src="{}"'.format(post.image.url), html)
@@ -280,6 +280,10 @@ class PaginatorViewsTest(TestCase):
         cls.PROFILE_REV = reverse('posts:profile',
                                   kwargs={'username': f'{cls.user.username}'})
 
+    def setUp(self):
+        # bulk_create не шлет сигналы и не сбрасывает кеш числа статей.
+        cache.clear()
+
     def test_paginator(self):
         """Проверка работы паджинатора"""
         page_obj_num = {
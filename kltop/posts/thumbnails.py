@@ -0,0 +1,248 @@
+"""Версии обложек для всей страницы одним обращением к хранилищу.
+
+Тег thumbnail из sorl-thumbnail ищет каждую версию отдельно: запрос к
+кешу, при промахе к таблице thumbnail_kvstore, а если версии нет, еще и
+проверка файла и её создание прямо во время отрисовки. prefetch_covers
+собирает все версии обложек страницы, берет их из кеша одним get_many,
+а промахи из таблицы одним запросом. Отсутствующие версии при отрисовке
+не создаются, страница показывает исходную обложку. Их создает команда
+generate_thumbnails, запущенная по расписанию в отдельном процессе.
+Обложка, которую не удалось обработать, запоминается на
+THUMBNAIL_FAILURE_TIMEOUT секунд и до тех пор не обрабатывается снова.
+
+thumbnail_file повторяет, как sorl-thumbnail 12.7 называет версии, и
+опирается на его внутренние методы. Версия sorl закреплена в
+requirements.txt, совпадение имен проверяет тест.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDbKVStore)
+from sorl.thumbnail.models import KVStore
+
+from .models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+
+# Обложка в карточке ленты.
+COVER_GEOMETRY = '960x339'
+# Обложка на странице статьи, см. posts/post_detail.html.
+DETAIL_GEOMETRY = '1280'
+GEOMETRIES = (COVER_GEOMETRY, DETAIL_GEOMETRY)
+FALLBACK_FORMAT = 'JPEG'
+# Старые SQLite принимают не больше 999 параметров в запросе.
+KEYS_PER_QUERY = 500
+
+
+def cover_versions(post, geometry):
+    """Размеры обложки на странице и нужные версии.
+
+    geometry "960x339" обрезает обложку до этих пропорций, "1280"
+    только ограничивает ширину. Возвращает (ширина, высота или None,
+    [(формат, ширина версии, геометрия версии, опции)]).
+    """
+    width, _, crop_height = geometry.partition('x')
+    width = int(width)
+    height = None
+    if crop_height:
+        height = int(crop_height)
+        options = {'crop': 'center', 'upscale': True}
+    else:
+        options = {'upscale': False}
+        if post.image_width:
+            width = min(width, post.image_width)
+            height = round(width * post.image_height / post.image_width)
+    widths = [size for size in settings.RESPONSIVE_IMAGE_WIDTHS
+              if size < width] + [width]
+    versions = []
+    for image_format in settings.RESPONSIVE_IMAGE_FORMATS + [
+            FALLBACK_FORMAT]:
+        for size in widths:
+            if crop_height:
+                version = '{}x{}'.format(size, round(size * height / width))
+            else:
+                version = str(size)
+            versions.append((image_format, size, version,
+                             dict(options, format=image_format)))
+    return width, height, versions
+
+
+def thumbnail_file(image, geometry, options):
+    """Файл версии так, как его назовет get_thumbnail, без обращений."""
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def resolve(files):
+    """Готовые версии из хранилища sorl: {ключ файла: ImageFile}.
+
+    Версий, которых еще нет, в ответе нет.
+    """
+    kvstore = default.kvstore
+    keys = {add_prefix(file.key): file.key for file in files}
+    if not isinstance(kvstore, CachedDbKVStore):
+        found = {}
+        for file in files:
+            cached = kvstore.get(file)
+            if cached:
+                found[file.key] = cached
+        return found
+    values = kvstore.cache.get_many(list(keys))
+    missing = [key for key in keys if key not in values]
+    if missing:
+        rows = dict(KVStore.objects.filter(key__in=missing).values_list(
+            'key', 'value'))
+        # Как и сам sorl, запоминаем в кеше и отсутствие версии.
+        fetched = {key: rows.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(fetched,
+                               sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+    return {keys[key]: deserialize_image_file(value)
+            for key, value in values.items() if value != EMPTY_VALUE}
+
+
+def delete_images(names):
+    """Удаляет файлы и их версии, как sorl.thumbnail.delete, но пачкой.
+
+    Записи хранилища sorl о файлах и версиях читаются и удаляются
+    парой запросов на всю пачку, а не несколькими на каждый файл.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDbKVStore):
+        for name in names:
+            kvstore.delete(ImageFile(name, default.storage))
+            default.storage.delete(name)
+        return
+    sources = [ImageFile(name, default.storage).key for name in names]
+    lists = select_values([add_prefix(key, 'thumbnails') for key in sources])
+    thumbnails = [add_prefix(key) for value in lists
+                  for key in deserialize(value)]
+    for value in select_values(thumbnails):
+        default.storage.delete(deserialize(value)['name'])
+    for name in names:
+        default.storage.delete(name)
+    keys = thumbnails + [add_prefix(key, identity) for key in sources
+                         for identity in ('image', 'thumbnails')]
+    for start in range(0, len(keys), KEYS_PER_QUERY):
+        kvstore._delete_raw(*keys[start:start + KEYS_PER_QUERY])
+
+
+def select_values(keys):
+    for start in range(0, len(keys), KEYS_PER_QUERY):
+        yield from KVStore.objects.filter(
+            key__in=keys[start:start + KEYS_PER_QUERY]).values_list(
+            'value', flat=True)
+
+
+def prefetch_covers(posts, geometry=COVER_GEOMETRY):
+    """Находит версии обложек статей для тега responsive_image.
+
+    Кладет в post.covers[geometry] размеры и {(формат, ширина): url}.
+    """
+    planned = []
+    for post in posts:
+        if not post.image:
+            continue
+        width, height, versions = cover_versions(post, geometry)
+        files = [(image_format, size, version, options,
+                  thumbnail_file(post.image, version, options))
+                 for image_format, size, version, options in versions]
+        planned.append((post, width, height, files))
+    found = resolve([item[-1] for _, _, _, files in planned
+                     for item in files])
+    for post, width, height, files in planned:
+        urls = {}
+        for image_format, size, _, _, file in files:
+            if file.key in found:
+                urls[image_format, size] = found[file.key].url
+        if not hasattr(post, 'covers'):
+            post.covers = {}
+        post.covers[geometry] = {'width': width, 'height': height,
+                                 'urls': urls}
+
+
+def failure_key(name):
+    return 'thumbnail_failed:{}'.format(
+        hashlib.md5(name.encode()).hexdigest())
+
+
+def create_version(name, geometry, options):
+    """Создает версию обложки, False, если обложку обработать не удалось."""
+    try:
+        thumbnail = get_thumbnail(name, geometry, **options)
+    except Exception:
+        logger.exception('Thumbnail %s of %s failed', geometry, name)
+        return False
+    # Без исходного файла sorl только пишет в журнал и ничего не сохраняет.
+    return bool(default.kvstore.get(thumbnail))
+
+
+def missing_versions(posts, geometries=GEOMETRIES):
+    """Версии обложек, которых еще нет: [(имя обложки, геометрия, опции)]."""
+    planned = {}
+    for post in posts:
+        if not post.image:
+            continue
+        for geometry in geometries:
+            for _, _, version, options in cover_versions(post, geometry)[2]:
+                file = thumbnail_file(post.image, version, options)
+                planned[file.key] = (file, (post.image.name, version,
+                                            options))
+    found = resolve([file for file, _ in planned.values()])
+    return [item for key, (_, item) in planned.items() if key not in found]
+
+
+def generate_missing(batch_size=100, retry_failed=False, progress=None):
+    """Создает недостающие версии обложек статей и архива.
+
+    Возвращает (число созданных версий, число обложек с ошибкой).
+    progress(created, failed) вызывается после каждой пачки статей.
+    """
+    created = failed = 0
+    for model in (Post, ArchivedPost):
+        last_pk = 0
+        while True:
+            posts = list(model.objects.filter(pk__gt=last_pk).exclude(
+                image='').order_by('pk').only(
+                'pk', 'image', 'image_width', 'image_height')[:batch_size])
+            if not posts:
+                break
+            last_pk = posts[-1].pk
+            missing = missing_versions(posts)
+            skipped = set()
+            if not retry_failed:
+                names = {failure_key(name): name for name, _, _ in missing}
+                skipped = {names[key] for key in cache.get_many(list(names))}
+            for name, geometry, options in missing:
+                if name in skipped:
+                    continue
+                if create_version(name, geometry, options):
+                    created += 1
+                    continue
+                cache.set(failure_key(name), True,
+                          settings.THUMBNAIL_FAILURE_TIMEOUT)
+                skipped.add(name)
+                failed += 1
+            if progress is not None:
+                progress(created, failed)
+    return created, failed
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 
 app_name = 'posts'
@@ -9,13 +9,41 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('feeds/rss/',
+         feeds.cached_feed(feeds.LatestPostsFeed),
+         name='feed_rss'),
+    path('feeds/atom/',
+         feeds.cached_feed(feeds.LatestPostsAtomFeed),
+         name='feed_atom'),
+    path('group/<slug:slug>/rss/',
+         feeds.cached_feed(feeds.GroupPostsFeed),
+         name='group_feed_rss'),
+    path('group/<slug:slug>/atom/',
+         feeds.cached_feed(feeds.GroupPostsAtomFeed),
+         name='group_feed_atom'),
+    path('profile/<str:username>/rss/',
+         feeds.cached_feed(feeds.AuthorPostsFeed),
+         name='profile_feed_rss'),
+    path('profile/<str:username>/atom/',
+         feeds.cached_feed(feeds.AuthorPostsAtomFeed),
+         name='profile_feed_atom'),
+    path('fragments/index/', views.index_fragment, name='index_fragment'),
+    path('fragments/group/<slug:slug>/', views.group_fragment,
+         name='group_fragment'),
+    path('fragments/profile/<str:username>/', views.profile_fragment,
+         name='profile_fragment'),
+    path('fragments/follow/', views.follow_fragment,
+         name='follow_fragment'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/', views.comments_poll,
+         name='comments_poll'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('popular/', views.popular_index, name='popular_index'),
     path('profile/<str:username>/follow/',
          views.profile_follow,
          name='profile_follow'),
@@ -1,25 +1,81 @@
+from functools import partial
+
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.http import HttpResponseNotModified, JsonResponse
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 
 from django.conf import settings
-from .models import Group, Post, Follow, User
+from core.assets import etag_matches
+from .models import (ArchivedPost, Comment, Post, Follow, FollowSuggestion,
+                     RelatedPost)
 from .forms import CommentForm, PostForm
+from .archive import ArchiveChain
+from .caching import SITE, author_scope, group_scope
+from .counters import record_view
+from .instances import group_cache, hydrate, user_cache
+from .live import COMMENTS_PER_POLL, latest_comment_id, wait_for_comments
+from .pagination import CachedCountPaginator, elided_page_range
+from .scroll import FEED_ORDER, next_batch, page_cursor
+from .thumbnails import prefetch_covers
 
 
 PAGINUM = settings.PAGI_NUM
 
 
-def paginator(request, posts):
-    paginator = Paginator(posts, PAGINUM)
+def paginator(request, posts, scope=None):
+    paginator = CachedCountPaginator(posts, PAGINUM, scope=scope)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    page_obj = paginator.get_page(page_number)
+    page_obj.elided_range = list(
+        elided_page_range(page_obj.number, paginator.num_pages))
+    # Шаблон вызовет функцию, только если отрисует ленту, а не кеш.
+    page_obj.next_cursor = partial(page_cursor, page_obj)
+    return page_obj
+
+
+def feed_fragment(request, posts, archived=None, show_posts_list=True):
+    """Следующая порция карточек ленты после ?cursor= в JSON."""
+    try:
+        batch, cursor = next_batch(posts, request.GET.get('cursor'),
+                                   PAGINUM, archived)
+    except ValueError:
+        return JsonResponse({'error': 'bad cursor'}, status=400)
+    batch = hydrate(batch)
+    prefetch_covers(batch)
+    html = render_to_string('posts/includes/posts_fragment.html', {
+        'posts': batch,
+        'show_posts_list': show_posts_list,
+    }, request)
+    return JsonResponse({'html': html, 'next': cursor})
+
+
+def follow_suggestions(user):
+    if not user.is_authenticated:
+        return []
+    # Подписки, сделанные после пересчета рекомендаций, отсекаются здесь.
+    return FollowSuggestion.objects.filter(user=user).exclude(
+        author__following__user=user).select_related(
+        'author')[:settings.FOLLOW_SUGGESTIONS_NUM]
+
+
+def author_posts(author):
+    """Статьи автора: сначала живые, затем из архива."""
+    return ArchiveChain(author.posts.order_by(*FEED_ORDER),
+                        author.archived_posts.order_by(*FEED_ORDER),
+                        author_scope(author.username))
+
+
+def followed_posts(user):
+    return Post.objects.filter(
+        author__following__user=user).order_by(*FEED_ORDER)
 
 
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
-    page_obj = paginator(request, post_list)
+    post_list = Post.objects.order_by(*FEED_ORDER)
+    page_obj = paginator(request, post_list, SITE)
     context = {
         'page_obj': page_obj,
     }
@@ -28,9 +84,9 @@ def index(request):
 
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginator(request, posts)
+    group = group_cache.get_or_404(slug)
+    posts = group.posts.order_by(*FEED_ORDER)
+    page_obj = paginator(request, posts, group_scope(slug))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -38,10 +94,31 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@login_required
+def index_fragment(request):
+    return feed_fragment(request, Post.objects.all())
+
+
+def group_fragment(request, slug):
+    group = group_cache.get_or_404(slug)
+    return feed_fragment(request, group.posts.all(), show_posts_list=False)
+
+
+def profile_fragment(request, username):
+    author = user_cache.get_or_404(username)
+    return feed_fragment(request, author.posts.all(),
+                         archived=author.archived_posts.all())
+
+
+@login_required
+def follow_fragment(request):
+    return feed_fragment(request, followed_posts(request.user))
+
+
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = user_cache.get_or_404(username)
+    posts = author_posts(author)
     page_obj = paginator(request, posts)
     num_of_posts = posts.count()
     following = request.user.is_authenticated and Follow.objects.filter(
@@ -54,25 +131,92 @@ def profile(request, username):
         'num_of_posts': num_of_posts,
         'page_obj': page_obj,
         'following': following,
+        'suggestions': follow_suggestions(request.user),
     }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    count_author = post.author.posts.count()
+    try:
+        post = Post.objects.get(pk=post_id)
+    except Post.DoesNotExist:
+        return archived_post_detail(request, post_id)
+    hydrate([post])
+    record_view(post.pk)
+    count_author = author_posts(post.author).count()
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = hydrate(post.comments.order_by('pk'))
+    related_posts = RelatedPost.objects.filter(post=post).select_related(
+        'related').only('related__id', 'related__title')
     context = {
         'post': post,
         'count_author': count_author,
         'form': form,
         'comments': comments,
+        'comments_cursor': comments[-1].pk if comments else 0,
+        'related_posts': related_posts,
+    }
+    return render(request, template, context)
+
+
+def archived_post_detail(request, post_id):
+    """Статья из архива: только чтение, без комментирования."""
+    template = 'posts/post_detail.html'
+    post = get_object_or_404(ArchivedPost, pk=post_id)
+    hydrate([post])
+    context = {
+        'post': post,
+        'count_author': author_posts(post.author).count(),
+        'comments': hydrate(post.comments.all()),
+        'related_posts': [],
+        'archived': True,
     }
     return render(request, template, context)
 
 
+def comments_poll(request, post_id):
+    """Комментарии новее ?after=.
+
+    Многопоточный сервер держит запрос до COMMENTS_POLL_TIMEOUT секунд,
+    пока не появится комментарий. Однопоточный воркер manage.py serve
+    отвечает сразу: клиент опрашивает его раз в несколько секунд и без
+    новых комментариев получает 304 по ETag.
+    """
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    latest = latest_comment_id(post_id)
+    if latest <= after and request.META.get('wsgi.multithread'):
+        latest = wait_for_comments(post_id, after,
+                                   settings.COMMENTS_POLL_TIMEOUT)
+    # after входит в ETag: ответ, урезанный до COMMENTS_PER_POLL, и
+    # следующий опрос с новым after имеют одинаковый latest.
+    etag = '"{}-{}-{}"'.format(post_id, after, latest)
+    if etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+        response = HttpResponseNotModified()
+    else:
+        comments = []
+        if latest > after:
+            comments = hydrate(Comment.objects.filter(
+                post_id=post_id, pk__gt=after).order_by('pk')[
+                    :COMMENTS_PER_POLL])
+        response = JsonResponse({
+            'cursor': comments[-1].pk if comments else after,
+            'comments': [{
+                'id': comment.pk,
+                'author': comment.author.username,
+                'profile_url': reverse('posts:profile',
+                                       args=[comment.author.username]),
+                'text': comment.text,
+            } for comment in comments],
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
@@ -127,20 +271,31 @@ def add_comment(request, post_id):
 def follow_index(request):
     template = 'posts/follow.html'
     user = request.user
-    follow_posts = Post.objects.filter(
-        author__following__user=user
-    )
+    follow_posts = followed_posts(user)
     page_obj = paginator(request, follow_posts)
     context = {
         'user': user,
         'page_obj': page_obj,
+        'suggestions': follow_suggestions(user),
+    }
+    return render(request, template, context)
+
+
+@login_required
+def popular_index(request):
+    template = 'posts/popular.html'
+    popular_posts = Post.objects.filter(popularity__gt=0).order_by(
+        '-popularity', '-pub_date')
+    page_obj = paginator(request, popular_posts)
+    context = {
+        'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = user_cache.get_or_404(username)
     follower = request.user
     if follower == author:
         return redirect('posts:profile', username=username)
@@ -150,6 +305,6 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = user_cache.get_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
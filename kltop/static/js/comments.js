@@ -0,0 +1,62 @@
+// Дописывает новые комментарии к статье без перезагрузки страницы.
+(function () {
+  var list = document.getElementById('comments');
+  if (!list || !window.fetch) {
+    return;
+  }
+  var url = list.dataset.pollUrl;
+  var cursor = list.dataset.cursor;
+  var etag = null;
+  var SHORT_ANSWER = 1000;
+  var POLL_INTERVAL = 5000;
+  var ERROR_INTERVAL = 15000;
+
+  function render(comment) {
+    var item = document.createElement('div');
+    item.className = 'media mb-4';
+    var body = document.createElement('div');
+    body.className = 'media-body';
+    var title = document.createElement('h5');
+    title.className = 'mt-0';
+    var link = document.createElement('a');
+    link.href = comment.profile_url;
+    link.textContent = comment.author;
+    var text = document.createElement('p');
+    text.textContent = comment.text;
+    title.appendChild(link);
+    body.appendChild(title);
+    body.appendChild(text);
+    item.appendChild(body);
+    list.appendChild(item);
+  }
+
+  function poll() {
+    var started = Date.now();
+    var headers = etag ? {'If-None-Match': etag} : {};
+    fetch(url + '?after=' + cursor, {headers: headers, credentials: 'same-origin'})
+      .then(function (response) {
+        if (response.status === 304) {
+          return null;
+        }
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        etag = response.headers.get('ETag');
+        return response.json();
+      })
+      .then(function (data) {
+        if (data) {
+          data.comments.forEach(render);
+          cursor = data.cursor;
+        }
+        // Сервер без ожидания отвечает сразу: тогда опрашиваем реже.
+        var quick = Date.now() - started < SHORT_ANSWER;
+        setTimeout(poll, quick ? POLL_INTERVAL : 0);
+      })
+      .catch(function () {
+        setTimeout(poll, ERROR_INTERVAL);
+      });
+  }
+
+  setTimeout(poll, POLL_INTERVAL);
+})();
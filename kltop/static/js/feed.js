@@ -0,0 +1,49 @@
+// Подгружает следующие статьи ленты при прокрутке вместо перехода
+// на следующую страницу. Без JavaScript работает обычный паджинатор.
+(function () {
+  var feed = document.querySelector('.feed[data-fragment-url]');
+  if (!feed || !feed.dataset.cursor || !window.fetch
+      || !window.IntersectionObserver) {
+    return;
+  }
+  var url = feed.dataset.fragmentUrl;
+  var cursor = feed.dataset.cursor;
+  var loading = false;
+  var sentinel = document.createElement('div');
+  feed.parentNode.insertBefore(sentinel, feed.nextSibling);
+  var pagination = document.querySelector('nav[aria-label="Page navigation"]');
+  if (pagination) {
+    pagination.hidden = true;
+  }
+
+  var observer = new IntersectionObserver(function (entries) {
+    if (!entries[0].isIntersecting || loading || !cursor) {
+      return;
+    }
+    loading = true;
+    fetch(url + '?cursor=' + encodeURIComponent(cursor),
+          {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.json();
+      })
+      .then(function (data) {
+        feed.insertAdjacentHTML('beforeend', data.html);
+        cursor = data.next;
+        if (!cursor) {
+          observer.disconnect();
+        }
+        loading = false;
+      })
+      .catch(function () {
+        // Не вышло: возвращаем обычный паджинатор.
+        observer.disconnect();
+        if (pagination) {
+          pagination.hidden = false;
+        }
+      });
+  }, {rootMargin: '600px'});
+  observer.observe(sentinel);
+})();
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from core.instances import InstanceCache
+
+user_cache = InstanceCache(get_user_model(), 'username',
+                           timeout=settings.USER_CACHE_TIMEOUT)
+
+
+def user_cache_key(user_id):
+    return user_cache.pk_key(user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который достает пользователя сессии из кеша.
+
+    Запись сбрасывается сигналами из users.signals при любом сохранении
+    или удалении пользователя, в том числе при смене пароля. Тот же кеш
+    служит профилям и подпискам, см. core.instances.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # ModelBackend после этого проверил бы тот же пароль второй
+            # раз, удвоив стоимость неудачного входа.
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        user = user_cache.get_by_pk(user_id)
+        return user if self.user_can_authenticate(user) else None
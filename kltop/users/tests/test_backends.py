@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, SESSION_KEY,
+                                 authenticate, get_user_model)
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..backends import CachedModelBackend, user_cache_key
+
+User = get_user_model()
+
+
+class CachedBackendTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def test_user_cached_after_first_lookup(self):
+        """Повторное получение пользователя не обращается к базе."""
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_cache_dropped_on_save(self):
+        """Смена пароля сбрасывает пользователя из кеша."""
+        self.backend.get_user(self.user.pk)
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        cached = self.backend.get_user(self.user.pk)
+        self.assertTrue(cached.check_password('new-password'))
+
+    def test_authenticated_page_without_auth_queries(self):
+        """Сессия и пользователь берутся из кеша."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('about:tech')
+        client.get(url)
+        with self.assertNumQueries(0):
+            client.get(url)
+
+    def test_old_sessions_stay_logged_in(self):
+        """Сессия, открытая через ModelBackend, остается в силе."""
+        # Другой тест меняет пароль у self.user только в памяти.
+        user = User.objects.get(pk=self.user.pk)
+        client = Client()
+        client.force_login(
+            user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(client.session[BACKEND_SESSION_KEY],
+                         'django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(client.session[SESSION_KEY], str(user.pk))
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_wrong_password_checked_once(self):
+        """Неверный пароль не проверяется вторым бэкендом."""
+        with mock.patch.object(ModelBackend, 'authenticate',
+                               autospec=True,
+                               side_effect=ModelBackend.authenticate) as check:
+            self.assertIsNone(authenticate(username='auth',
+                                           password='wrong'))
+        self.assertEqual(check.call_count, 1)
+        self.assertEqual(len(settings.AUTHENTICATION_BACKENDS), 2)